@@ -0,0 +1,472 @@
+"""
+Mesures de performance de TextAnalyzer et StationMeteo
+Compare l'appel des analyses une par une avec analyser_tout(), la classification
+des caractères boucle par boucle avec verifier_classes() et compter_classes(),
+la boucle TextAnalyzer avec analyser_lot() sur des textes courts, et la mémoire et
+le stockage des statistiques en dict, en enregistrements compacts et en binaire.
+
+Avec --journal, écrit un journal de station de la taille demandée (plusieurs Go
+possibles) et le lit en flux avec releves.lire_releves() :
+
+    python benchmark.py --journal 4096
+
+Avec --suite, chronomètre chaque méthode publique sur des corpus synthétiques de
+plusieurs tailles, enregistre débit et mémoire maximale en JSON et signale les
+régressions par rapport à une référence :
+
+    python benchmark.py --suite --sortie reference.json
+    python benchmark.py --suite --reference reference.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import pickle
+import platform
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from curse import Mesure, StationMeteo
+from flotte import Flotte
+from lot_mesures import MesureBatch
+from main import TextAnalyzer, analyser_lot, compter_classes, verifier_classes
+from releves import lire_releves
+from resultats import compacter, ecrire_resultats, lire_resultats
+from validation import REGLES_METEO
+
+
+METHODES_SEPAREES = [
+    "analyser_caracteres",
+    "analyser_mots",
+    "analyser_lignes",
+    "detecter_patterns",
+    "verifier_conditions_texte",
+    "analyser_taille_mots",
+]
+
+
+VILLES = ["Paris", "Lyon", "Marseille", "Lille", "Brest", "Nice", "Strasbourg", "Saint-Étienne"]
+
+
+def generer_texte(taille, graine=0, accents=False, mots_longs=False, mots_par_ligne=15):
+    """
+    Génère un texte pseudo-aléatoire reproductible d'environ `taille` caractères.
+
+    Args:
+        accents (bool): ajoute des mots français accentués au vocabulaire
+        mots_longs (bool): remplace le vocabulaire par des mots de 10 à 25 lettres
+        mots_par_ligne (int): nombre maximal de mots par ligne (1 : beaucoup de lignes courtes)
+    """
+    generateur = random.Random(graine)
+    vocabulaire = ["Bonjour", "le", "monde", "et", "je", "suis", "content.", "Ah", "que", "oui.",
+                   "123", "2024", "test@test.com", "analyse", "texte", "a"]
+    if mots_longs:
+        vocabulaire = ["anticonstitutionnellement", "Développement", "transformations", "caractéristique.",
+                       "interdisciplinaire", "extraordinairement", "0123456789012", "Renseignements"]
+    if accents:
+        vocabulaire += ["été", "Élève", "déjà", "où", "français."]
+    morceaux = []
+    total = 0
+    while total < taille:
+        ligne = " ".join(generateur.choice(vocabulaire) for _ in range(generateur.randint(0, mots_par_ligne)))
+        morceaux.append(ligne)
+        total += len(ligne) + 1
+    return "\n".join(morceaux)
+
+
+def generer_journal_meteo(taille, graine=0):
+    """Génère un journal de station météo reproductible d'environ `taille` caractères"""
+    generateur = random.Random(graine)
+    morceaux = []
+    total = 0
+    while total < taille:
+        tirage = generateur.random()
+        if tirage < 0.05:
+            ligne = f"# Relevé {generateur.choice(VILLES)}"
+        elif tirage < 0.1:
+            ligne = ""
+        elif tirage < 0.15:
+            ligne = f"Alerte orage à {generateur.choice(VILLES)} !"
+        else:
+            ligne = (f"{generateur.randint(1, 28):02d}/{generateur.randint(1, 12):02d}/2024 "
+                     f"{generateur.randint(0, 23):02d}:{generateur.randint(0, 59):02d} "
+                     f"Humidité: {generateur.randint(0, 100)}% Pression: {generateur.randint(960, 1050)} hPa "
+                     f"Température: {generateur.uniform(-20, 40):.1f}°C")
+        morceaux.append(ligne)
+        total += len(ligne) + 1
+    return "\n".join(morceaux)
+
+
+def generer_mesures(nombre, graine=0):
+    """Génère `nombre` mesures au format dict de StationMeteo (temp, humidite, pression, ville, pluvieux)"""
+    generateur = random.Random(graine)
+    return [
+        {
+            "temp": round(generateur.uniform(-20, 40), 1),
+            "humidite": generateur.randint(0, 100),
+            "pression": generateur.randint(960, 1050),
+            "ville": generateur.choice(VILLES),
+            "pluvieux": generateur.random() < 0.3,
+        }
+        for _ in range(nombre)
+    ]
+
+
+def chronometrer(fonction, repetitions=3):
+    """Retourne le meilleur temps (en secondes) sur plusieurs exécutions"""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def comparer_analyse_complete(taille, accents=False):
+    texte = generer_texte(taille, accents=accents)
+
+    def separees():
+        analyseur = TextAnalyzer(texte)
+        for nom in METHODES_SEPAREES:
+            getattr(analyseur, nom)()
+        return analyseur.stats
+
+    def fusionnee():
+        return TextAnalyzer(texte).analyser_tout()
+
+    if separees() != fusionnee():
+        raise AssertionError("analyser_tout() ne donne pas les mêmes statistiques")
+
+    temps_separees = chronometrer(separees)
+    temps_fusionnee = chronometrer(fusionnee)
+    print(f"{len(texte):>12,} car. {'accentué' if accents else 'ASCII':<8} | séparées : {temps_separees:8.3f} s | "
+          f"analyser_tout : {temps_fusionnee:8.3f} s | gain : x{temps_separees / temps_fusionnee:.1f}")
+
+
+def comparer_classification(taille, accents=False):
+    texte = generer_texte(taille, accents=accents)
+
+    def boucles():
+        # Les any()/all() et la boucle d'origine de verifier_conditions_texte et analyser_caracteres
+        conditions = (any(char.isalpha() for char in texte), any(char.isdigit() for char in texte),
+                      any(char.isspace() for char in texte), all(char.isalpha() for char in texte))
+        lettres = chiffres = espaces = 0
+        for char in texte:
+            if char.isalpha():
+                lettres += 1
+            elif char.isdigit():
+                chiffres += 1
+            elif char.isspace():
+                espaces += 1
+        return conditions, (lettres, chiffres, espaces)
+
+    def classes():
+        return verifier_classes(texte), compter_classes(texte)
+
+    if boucles() != classes():
+        raise AssertionError("verifier_classes() ou compter_classes() ne donne pas les mêmes résultats")
+
+    temps_boucles = chronometrer(boucles, repetitions=1)
+    temps_classes = chronometrer(classes)
+    print(f"{len(texte):>12,} car. {'accentué' if accents else 'ASCII':<8} | boucles : {temps_boucles:8.3f} s | "
+          f"classes : {temps_classes:8.3f} s | gain : x{temps_boucles / temps_classes:.1f}")
+
+
+def comparer_lot(nombre_textes, processus=None):
+    generateur = random.Random(1)
+    textes = [generer_texte(generateur.randint(20, 200), graine=i) for i in range(nombre_textes)]
+
+    def boucle():
+        resultats = []
+        for texte in textes:
+            analyseur = TextAnalyzer(texte)
+            for nom in ("analyser_caracteres", "analyser_mots", "analyser_lignes", "detecter_patterns"):
+                getattr(analyseur, nom)()
+            resultats.append(analyseur.stats)
+        return resultats
+
+    temps_boucle = chronometrer(boucle, repetitions=1)
+    temps_lot = chronometrer(lambda: analyser_lot(textes, processus=processus), repetitions=1)
+    print(f"{nombre_textes:>12,} textes | boucle : {temps_boucle:8.3f} s | analyser_lot : {temps_lot:8.3f} s "
+          f"({nombre_textes / temps_lot:,.0f} textes/s) | gain : x{temps_boucle / temps_lot:.1f}")
+
+
+def comparer_resultats(nombre_documents):
+    textes = [generer_texte(100 + i % 50, graine=i) for i in range(nombre_documents)]
+    documents = [TextAnalyzer(texte).analyser_tout() for texte in textes]
+
+    def memoire(fabrique):
+        gc.collect()
+        tracemalloc.start()
+        valeurs = fabrique()
+        taille = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del valeurs
+        return taille / nombre_documents
+
+    en_json = [json.dumps(stats) for stats in documents]
+    memoire_dict = memoire(lambda: [json.loads(texte) for texte in en_json])
+    memoire_compacte = memoire(lambda: [compacter(json.loads(texte)) for texte in en_json])
+    compacts = [compacter(stats) for stats in documents]
+
+    binaire = io.BytesIO()
+    temps_ecriture = chronometrer(lambda: ecrire_resultats(io.BytesIO(), compacts), repetitions=1)
+    ecrire_resultats(binaire, compacts)
+
+    def lire():
+        binaire.seek(0)
+        return list(lire_resultats(binaire))
+
+    temps_lecture = chronometrer(lire, repetitions=1)
+    temps_json = chronometrer(lambda: [json.loads(texte) for texte in en_json], repetitions=1)
+    taille_pickle = sum(len(pickle.dumps(stats)) for stats in documents) / nombre_documents
+    print(f"{nombre_documents:>12,} documents | mémoire : {memoire_dict:,.0f} o en dict, "
+          f"{memoire_compacte:,.0f} o compacts | stockage : {len(binaire.getvalue()) / nombre_documents:,.0f} o "
+          f"binaire, {sum(map(len, en_json)) / nombre_documents:,.0f} o JSON, {taille_pickle:,.0f} o pickle | "
+          f"lecture : {temps_lecture:.3f} s binaire, {temps_json:.3f} s JSON | écriture : {temps_ecriture:.3f} s")
+
+
+def memoire_maximale():
+    """Pic de mémoire résidente du processus, en Mo (ru_maxrss est en Ko sous Linux, en octets sous macOS)"""
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / (1 << 20) if sys.platform == "darwin" else pic / 1024
+
+
+def comparer_journal(taille_mo, dossier=None, comparaison_max_mo=256):
+    """
+    Lit en flux un journal météo synthétique de `taille_mo` Mo écrit dans `dossier`
+    (temporaire par défaut) ; jusqu'à `comparaison_max_mo`, le compare à la lecture
+    complète suivie de StationMeteo.extraire_donnees_avec_regex().
+    """
+    motif = (generer_journal_meteo(1 << 22, graine=7) + "\n").encode("utf-8")
+    with tempfile.TemporaryDirectory(dir=dossier) as repertoire:
+        chemin = os.path.join(repertoire, "station.log")
+        with open(chemin, "wb") as fichier:
+            for _ in range(max(taille_mo * (1 << 20) // len(motif), 1)):
+                fichier.write(motif)
+        taille = os.path.getsize(chemin)
+
+        avant = memoire_maximale()
+        debut = time.perf_counter()
+        releves = sum(1 for _ in lire_releves(chemin))
+        secondes = time.perf_counter() - debut
+        print(f"{taille / (1 << 20):>10,.0f} Mo | lire_releves : {secondes:8.2f} s ({taille / (1 << 20) / secondes:,.1f} Mo/s), "
+              f"{releves:,} relevés, mémoire max +{max(memoire_maximale() - avant, 0):,.0f} Mo")
+
+        if taille_mo <= comparaison_max_mo:
+            avant = memoire_maximale()
+            debut = time.perf_counter()
+            with open(chemin, encoding="utf-8") as fichier:
+                donnees = StationMeteo.extraire_donnees_avec_regex(fichier.read())
+            secondes = time.perf_counter() - debut
+            print(f"{'':>10}    | texte entier + extraire_donnees_avec_regex : {secondes:8.2f} s, "
+                  f"{donnees['total_mesures']:,} températures, mémoire max +{max(memoire_maximale() - avant, 0):,.0f} Mo")
+
+
+# Corpus de la suite : nom -> options de generer_texte()
+CORPUS_TEXTE = {
+    "ascii": dict(),
+    "accentue": dict(accents=True),
+    "mots_longs": dict(mots_longs=True, accents=True),
+    "lignes_courtes": dict(mots_par_ligne=1),
+    "lignes_longues": dict(mots_par_ligne=300),
+}
+
+# Méthodes publiques chronométrées : nom -> appel sur un TextAnalyzer neuf
+METHODES_TEXTE = {
+    "analyser_caracteres": TextAnalyzer.analyser_caracteres,
+    "analyser_mots": TextAnalyzer.analyser_mots,
+    "analyser_lignes": TextAnalyzer.analyser_lignes,
+    "detecter_patterns": TextAnalyzer.detecter_patterns,
+    "detecter_avec_regex": TextAnalyzer.detecter_avec_regex,
+    "verifier_conditions_texte": TextAnalyzer.verifier_conditions_texte,
+    "analyser_taille_mots": TextAnalyzer.analyser_taille_mots,
+    "mots_frequents": TextAnalyzer.mots_frequents,
+    "filtrer_mots": lambda analyseur: sum(1 for _ in analyseur.filtrer_mots(longueur_min=5, majuscule=True)),
+    "analyser_tout": TextAnalyzer.analyser_tout,
+    "generer_rapport": TextAnalyzer.generer_rapport,
+}
+
+METHODES_JOURNAL = {
+    "analyser_donnees_brutes": StationMeteo.analyser_donnees_brutes,
+    "extraire_donnees_avec_regex": StationMeteo.extraire_donnees_avec_regex,
+    "analyser_flux_brut": lambda texte: StationMeteo.analyser_flux_brut([texte]),
+}
+
+METHODES_MESURES = {
+    "valider_coherence_donnees": lambda mesures: StationMeteo().valider_coherence_donnees(mesures),
+    "analyser_tendances_optimise": lambda mesures: StationMeteo().analyser_tendances_optimise(mesures),
+    "analyser_avec_operateurs_ternaires": StationMeteo.analyser_avec_operateurs_ternaires,
+    "mesures_analyser": lambda mesures: [
+        (mesure.analyser_humidite(), mesure.analyser_temperature(), mesure.analyser_ville(),
+         mesure.analyser_conditions_meteo(), mesure.classifier_conditions_avancees())
+        for mesure in (Mesure(m["temp"], m["humidite"], m["pression"], m["ville"], m["pluvieux"])
+                       for m in mesures)
+    ],
+    "station_ajouter_mesure": lambda mesures: (
+        lambda station: ([station.ajouter_mesure(mesure) for mesure in mesures], station.analyser_tendances_station())
+    )(StationMeteo(retention=max(len(mesures) // 2, 1))),
+    "lot_mesures_analyser": lambda mesures: (
+        lambda lot: (lot.analyser_humidite(), lot.analyser_temperature(), lot.analyser_ville(),
+                     lot.analyser_conditions_meteo(), lot.classifier_conditions_avancees())
+    )(MesureBatch.depuis_dicts(mesures)),
+    "regles_meteo_valider": lambda mesures: REGLES_METEO.valider(mesures),
+    "lot_mesures_valider": lambda mesures: MesureBatch.depuis_dicts(mesures).valider(),
+    "flotte_ingerer": lambda mesures: Flotte().ingerer((mesure["ville"], mesure) for mesure in mesures),
+}
+
+
+def mesurer(fonction, volume, repetitions=3):
+    """
+    Retourne le meilleur temps, le débit (volume par seconde) et le pic de mémoire
+    allouée par Python. La mémoire est mesurée à part : tracemalloc ralentit l'exécution.
+    """
+    secondes = chronometrer(fonction, repetitions)
+    tracemalloc.start()
+    try:
+        fonction()
+        _, memoire_max = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "secondes": secondes,                                         # float
+        "debit": volume / secondes if secondes else float("inf"),    # float
+        "memoire_max": memoire_max,                                   # int: octets
+    }
+
+
+def executer_suite(tailles=(10_000, 100_000, 1_000_000), repetitions=3, afficher=True):
+    """Chronomètre chaque méthode publique sur chaque corpus et chaque taille ; retourne une liste de résultats"""
+    resultats = []
+
+    def ajouter(corpus, taille, methode, unite, volume, fonction):
+        resultat = {"corpus": corpus, "taille": taille, "methode": methode, "unite": unite}
+        resultat.update(mesurer(fonction, volume, repetitions))
+        resultats.append(resultat)
+        if afficher:
+            print(f"{corpus:<15} {taille:>10,} {methode:<36} {resultat['secondes']:9.4f} s "
+                  f"{resultat['debit']:>14,.0f} {unite:<9} {resultat['memoire_max'] / 1e6:9.2f} Mo")
+
+    for taille in tailles:
+        for corpus, options in CORPUS_TEXTE.items():
+            texte = generer_texte(taille, **options)
+            for methode, appel in METHODES_TEXTE.items():
+                # Un analyseur neuf à chaque exécution : aucun cache d'un appel à l'autre
+                ajouter(corpus, taille, methode, "car./s", len(texte),
+                        lambda appel=appel: appel(TextAnalyzer(texte)))
+
+        journal = generer_journal_meteo(taille)
+        for methode, appel in METHODES_JOURNAL.items():
+            ajouter("journal_meteo", taille, methode, "car./s", len(journal), lambda appel=appel: appel(journal))
+
+        # Environ une mesure pour 100 caractères de journal
+        mesures = generer_mesures(max(taille // 100, 1))
+        for methode, appel in METHODES_MESURES.items():
+            ajouter("mesures", taille, methode, "mesures/s", len(mesures), lambda appel=appel: appel(mesures))
+    return resultats
+
+
+def enregistrer_resultats(resultats, chemin):
+    document = {
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "resultats": resultats,
+    }
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        json.dump(document, fichier, ensure_ascii=False, indent=2)
+
+
+# Écarts absolus en dessous desquels une différence est du bruit de mesure
+ECARTS_NEGLIGEABLES = {"secondes": 0.001, "memoire_max": 64 * 1024}
+
+
+def comparer_reference(resultats, chemin_reference, tolerance=0.25):
+    """
+    Compare les résultats à une référence enregistrée par enregistrer_resultats().
+
+    Retourne la liste des régressions : mesures plus lentes (ou plus gourmandes en
+    mémoire) que la référence de plus de `tolerance` (0.25 = 25 %) et d'au moins
+    ECARTS_NEGLIGEABLES.
+    """
+    with open(chemin_reference, encoding="utf-8") as fichier:
+        reference = {
+            (r["corpus"], r["taille"], r["methode"]): r for r in json.load(fichier)["resultats"]
+        }
+
+    regressions = []
+    for resultat in resultats:
+        ancien = reference.get((resultat["corpus"], resultat["taille"], resultat["methode"]))
+        if ancien is None:
+            continue
+        for cle in ("secondes", "memoire_max"):
+            if resultat[cle] - ancien[cle] < ECARTS_NEGLIGEABLES[cle]:
+                continue
+            if resultat[cle] > ancien[cle] * (1 + tolerance):
+                regressions.append({
+                    "corpus": resultat["corpus"],
+                    "taille": resultat["taille"],
+                    "methode": resultat["methode"],
+                    "mesure": cle,
+                    "reference": ancien[cle],
+                    "actuel": resultat[cle],
+                    "rapport": resultat[cle] / ancien[cle] if ancien[cle] else float("inf"),
+                })
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance de TextAnalyzer et StationMeteo")
+    parser.add_argument("--suite", action="store_true", help="chronomètre toutes les méthodes publiques")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="tailles des corpus en caractères")
+    parser.add_argument("--repetitions", type=int, default=3, help="exécutions par mesure (meilleur temps)")
+    parser.add_argument("--sortie", help="fichier JSON où enregistrer les résultats")
+    parser.add_argument("--reference", help="fichier JSON de référence pour détecter les régressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="écart toléré avant régression (0.25 = 25 %%)")
+    parser.add_argument("--journal", type=int, metavar="MO",
+                        help="lit en flux un journal météo synthétique de MO mégaoctets")
+    parser.add_argument("--dossier", help="dossier du journal synthétique (temporaire par défaut)")
+    options = parser.parse_args(arguments)
+
+    if options.journal:
+        comparer_journal(options.journal, options.dossier)
+        return 0
+
+    if not options.suite:
+        comparer_tout()
+        return 0
+
+    resultats = executer_suite(options.tailles, options.repetitions)
+    if options.sortie:
+        enregistrer_resultats(resultats, options.sortie)
+    if options.reference:
+        regressions = comparer_reference(resultats, options.reference, options.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression['corpus']} {regression['taille']:,} {regression['methode']} "
+                  f"{regression['mesure']} : x{regression['rapport']:.2f}")
+        if regressions:
+            return 1
+        print("Aucune régression")
+    return 0
+
+
+def comparer_tout():
+    for taille in (100_000, 1_000_000, 5_000_000):
+        comparer_analyse_complete(taille)
+        comparer_analyse_complete(taille, accents=True)
+    for accents in (False, True):
+        comparer_classification(100_000_000, accents)
+    for nombre_textes in (10_000, 100_000):
+        comparer_lot(nombre_textes)
+    comparer_resultats(100_000)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Cache - Résultats d'analyse réutilisés pour les textes déjà analysés
+Les résultats sont indexés par l'empreinte du contenu (BLAKE2b) et les catégories
+demandées : un texte identique (nouvel essai, doublon, courriel généré depuis un
+modèle) n'est pas analysé une seconde fois. Un niveau mémoire borné (LRU) peut être
+complété par une base SQLite qui survit aux redémarrages.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+from main import TextAnalyzer
+from resultats import compacter, depuis_octets, vers_octets
+
+
+def empreinte(texte, categories=None):
+    """
+    Clé de cache : empreinte du texte et catégories demandées (dans n'importe quel ordre),
+    "*" pour analyser_tout().
+    """
+    contenu = blake2b(texte.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{contenu}:{'*' if categories is None else ','.join(sorted(set(categories)))}"
+
+
+class CacheResultats:
+    """
+    Cache des statistiques de TextAnalyzer, partageable entre threads.
+
+    Args:
+        capacite (int): nombre de résultats gardés en mémoire ; au-delà, le moins
+            récemment utilisé est retiré (il reste sur disque si `chemin` est donné)
+        chemin (str): base SQLite persistante, consultée quand un résultat n'est pas en mémoire
+
+    Exemple:
+        >>> cache = CacheResultats(capacite=100)
+        >>> cache.analyser("Bonjour le monde", ["mots"])["mots"]["nombre_mots"]
+        3
+        >>> _ = cache.analyser("Bonjour le monde", ["mots"])
+        >>> cache.statistiques()["succes_memoire"], cache.statistiques()["echecs"]
+        (1, 1)
+    """
+
+    def __init__(self, capacite=1024, chemin=None):
+        self.capacite = capacite        # int
+        self.chemin = chemin            # str ou None
+        self._memoire = OrderedDict()   # OrderedDict: clé -> ResultatsTexte, du moins au plus récent
+        self._verrou = threading.Lock()
+        self._compteurs = dict(succes_memoire=0, succes_disque=0, echecs=0, evictions=0)
+        self._base = None
+        if chemin is not None:
+            self._base = sqlite3.connect(chemin, check_same_thread=False, timeout=30)
+            self._base.execute("PRAGMA journal_mode=WAL")
+            self._base.execute("PRAGMA synchronous=NORMAL")
+            self._base.execute("CREATE TABLE IF NOT EXISTS resultats (cle TEXT PRIMARY KEY, valeur BLOB NOT NULL)")
+            self._base.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+    def fermer(self):
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+
+    def __len__(self):
+        return len(self._memoire)
+
+    def _garder(self, cle, resultats):
+        self._memoire[cle] = resultats
+        self._memoire.move_to_end(cle)
+        while len(self._memoire) > self.capacite:
+            self._memoire.popitem(last=False)
+            self._compteurs["evictions"] += 1
+
+    def obtenir(self, texte, categories=None):
+        """
+        Statistiques en cache de `texte` pour `categories`, ou None. Les dict sont neufs,
+        les listes (mots_par_ligne...) sont partagées avec le cache.
+        """
+        return self._obtenir(empreinte(texte, categories), categories)
+
+    def _obtenir(self, cle, categories):
+        with self._verrou:
+            resultats = self._memoire.get(cle)
+            if resultats is not None:
+                self._memoire.move_to_end(cle)
+                self._compteurs["succes_memoire"] += 1
+            elif self._base is not None:
+                ligne = self._base.execute("SELECT valeur FROM resultats WHERE cle = ?", (cle,)).fetchone()
+                if ligne is not None:
+                    resultats = depuis_octets(ligne[0])
+                    self._garder(cle, resultats)
+                    self._compteurs["succes_disque"] += 1
+            if resultats is None:
+                self._compteurs["echecs"] += 1
+                return None
+        stats = resultats.vers_dict()
+        return stats if categories is None else {categorie: stats[categorie] for categorie in categories}
+
+    def enregistrer(self, texte, categories, stats):
+        """Met en cache les statistiques `stats` de `texte` pour `categories`"""
+        self._enregistrer(empreinte(texte, categories), stats)
+
+    def _enregistrer(self, cle, stats):
+        resultats = compacter(stats)
+        with self._verrou:
+            self._garder(cle, resultats)
+            if self._base is not None:
+                self._base.execute("INSERT OR REPLACE INTO resultats VALUES (?, ?)", (cle, vers_octets(resultats)))
+                self._base.commit()
+
+    def analyser(self, texte, categories=None):
+        """
+        Statistiques de `texte` : analyser_tout() si `categories` est None, sinon les
+        catégories demandées ; calculées seulement si elles ne sont pas en cache.
+        """
+        cle = empreinte(texte, categories)
+        stats = self._obtenir(cle, categories)
+        if stats is None:
+            analyseur = TextAnalyzer(texte)
+            if categories is None:
+                stats = analyseur.analyser_tout()
+            else:
+                stats = {categorie: analyseur.stats[categorie] for categorie in categories}
+            self._enregistrer(cle, stats)
+        return stats
+
+    def statistiques(self):
+        """Succès (mémoire, disque), échecs, résultats retirés de la mémoire et taux de succès"""
+        with self._verrou:
+            compteurs = dict(self._compteurs, taille=len(self._memoire))
+        demandes = compteurs["succes_memoire"] + compteurs["succes_disque"] + compteurs["echecs"]
+        compteurs["taux_succes"] = (compteurs["succes_memoire"] + compteurs["succes_disque"]) / demandes if demandes else 0.0
+        return compteurs
+
+    def vider(self):
+        """Vide la mémoire, la base SQLite et les compteurs"""
+        with self._verrou:
+            self._memoire.clear()
+            self._compteurs = dict.fromkeys(self._compteurs, 0)
+            if self._base is not None:
+                self._base.execute("DELETE FROM resultats")
+                self._base.commit()
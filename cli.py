@@ -0,0 +1,162 @@
+"""
+Ligne de commande - Analyse par lots de fichiers, d'arborescences ou de l'entrée standard
+Un enregistrement JSON par document est écrit sur la sortie standard (JSONL)
+dès que son analyse est terminée.
+
+Exemples:
+    python cli.py corpus/ --jobs 8 --motif "*.txt" > resultats.jsonl
+    python cli.py article.txt --analyses mots lignes
+    cat releves.log | python cli.py --meteo
+    python cli.py courriels/ --cache resultats.sqlite
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from cache import CacheResultats
+from curse import StationMeteo
+from main import METHODES_PAR_CATEGORIE, TextAnalyzer
+
+
+TAILLE_PAQUET = 32  # documents envoyés ensemble à un processus
+
+
+def lister_documents(chemins, motif="*"):
+    """Produit les fichiers de `chemins`, en parcourant les dossiers récursivement dans l'ordre alphabétique"""
+    for chemin in chemins:
+        if not os.path.isdir(chemin):
+            yield chemin
+            continue
+        for dossier, sous_dossiers, fichiers in os.walk(chemin):
+            sous_dossiers.sort()
+            for fichier in sorted(fichiers):
+                if fnmatch.fnmatch(fichier, motif):
+                    yield os.path.join(dossier, fichier)
+
+
+# Caches ouverts par ce processus : chemin de la base SQLite -> CacheResultats
+_caches = dict()
+
+
+def cache_processus(chemin):
+    """Cache de ce processus pour la base `chemin`, ouvert au premier appel"""
+    if chemin not in _caches:
+        _caches[chemin] = CacheResultats(chemin=chemin)
+    return _caches[chemin]
+
+
+def analyser_contenu(texte, categories=None, meteo=False, cache=None):
+    """
+    Statistiques d'un texte : analyser_tout() en un parcours si `categories` est None,
+    sinon seulement les catégories demandées. En mode `meteo`, données extraites
+    par StationMeteo.extraire_donnees_avec_regex(). Avec `cache` (chemin d'une base
+    SQLite), un texte déjà analysé n'est pas analysé de nouveau.
+    """
+    if meteo:
+        return StationMeteo.extraire_donnees_avec_regex(texte)
+    if cache is not None:
+        return cache_processus(cache).analyser(texte, categories)
+    analyseur = TextAnalyzer(texte)
+    if categories is None:
+        return analyseur.analyser_tout()
+    return {categorie: analyseur.stats[categorie] for categorie in categories}
+
+
+def analyser_document(chemin, categories=None, meteo=False, encoding="utf-8", cache=None):
+    """Enregistrement JSONL d'un fichier ; une erreur de lecture est rapportée, pas levée"""
+    try:
+        # Fins de ligne conservées telles quelles, comme TextAnalyzer.depuis_flux()
+        with open(chemin, encoding=encoding, newline="") as fichier:
+            texte = fichier.read()
+    except (OSError, UnicodeDecodeError) as erreur:
+        return {"document": chemin, "erreur": f"{type(erreur).__name__}: {erreur}"}
+    return {"document": chemin, "caracteres": len(texte),
+            "stats": analyser_contenu(texte, categories, meteo, cache)}
+
+
+def analyser_paquet(chemins, categories=None, meteo=False, encoding="utf-8", cache=None):
+    return [analyser_document(chemin, categories, meteo, encoding, cache) for chemin in chemins]
+
+
+def map_des_que_pret(executeur, fonction, elements, en_attente, *args):
+    """Comme main.map_borne(), mais produit chaque résultat dès qu'il est prêt, dans le désordre"""
+    elements = iter(elements)
+    futures = set()
+    while True:
+        for element in islice(elements, en_attente - len(futures)):
+            futures.add(executeur.submit(fonction, element, *args))
+        if not futures:
+            return
+        terminees, futures = wait(futures, return_when=FIRST_COMPLETED)
+        for future in terminees:
+            yield future.result()
+
+
+def analyser_documents(documents, categories=None, meteo=False, encoding="utf-8", jobs=1, taille_paquet=TAILLE_PAQUET,
+                       cache=None):
+    """Produit les enregistrements des fichiers `documents` au fil de l'eau, dans le désordre si jobs > 1"""
+    documents = iter(documents)
+    if jobs <= 1:
+        for chemin in documents:
+            yield analyser_document(chemin, categories, meteo, encoding, cache)
+        return
+
+    paquets = iter(lambda: list(islice(documents, taille_paquet)), [])
+    with ProcessPoolExecutor(max_workers=jobs) as executeur:
+        for enregistrements in map_des_que_pret(executeur, analyser_paquet, paquets, 2 * jobs,
+                                                categories, meteo, encoding, cache):
+            yield from enregistrements
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Analyse de fichiers texte, résultats en JSONL")
+    parser.add_argument("chemins", nargs="*", default=["-"],
+                        help="fichiers ou dossiers à analyser ; '-' ou rien pour l'entrée standard")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="nombre de processus")
+    parser.add_argument("--analyses", nargs="+", choices=list(METHODES_PAR_CATEGORIE),
+                        help="catégories à calculer (par défaut : celles de analyser_tout)")
+    parser.add_argument("--meteo", action="store_true",
+                        help="extrait les relevés météo (StationMeteo.extraire_donnees_avec_regex)")
+    parser.add_argument("--motif", default="*", help="motif des noms de fichiers retenus dans les dossiers")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--paquet", type=int, default=TAILLE_PAQUET, help="documents envoyés ensemble à un processus")
+    parser.add_argument("--cache", metavar="BASE",
+                        help="base SQLite des résultats, réutilisés pour les textes déjà analysés")
+    options = parser.parse_args(arguments)
+    if options.meteo and (options.analyses or options.cache):
+        parser.error("--meteo ne se combine ni avec --analyses ni avec --cache")
+
+    erreurs = 0
+    fichiers = [chemin for chemin in options.chemins if chemin != "-"]
+    if len(fichiers) < len(options.chemins):
+        # Fins de ligne conservées et erreur de lecture rapportée, comme pour les fichiers
+        try:
+            texte = sys.stdin.buffer.read().decode(options.encoding)
+        except (OSError, UnicodeDecodeError) as erreur:
+            enregistrement = {"document": "-", "erreur": f"{type(erreur).__name__}: {erreur}"}
+        else:
+            enregistrement = {"document": "-", "caracteres": len(texte),
+                              "stats": analyser_contenu(texte, options.analyses, options.meteo, options.cache)}
+        erreurs += "erreur" in enregistrement
+        print(json.dumps(enregistrement, ensure_ascii=False), flush=True)
+
+    if fichiers:
+        documents = lister_documents(fichiers, options.motif)
+        for enregistrement in analyser_documents(documents, options.analyses, options.meteo,
+                                                 options.encoding, options.jobs, options.paquet, options.cache):
+            erreurs += "erreur" in enregistrement
+            print(json.dumps(enregistrement, ensure_ascii=False), flush=True)
+
+    if erreurs:
+        print(f"{erreurs} document(s) en erreur", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,59 @@
-import re
+from esquisses import Echantillon
+from instrumentation import instrumenter
+from main import TAILLE_BLOC, lire_lignes
+from motifs import MOTIFS_METEO
+from series import SerieMeteo
+from validation import REGLES_METEO
+
+
+# Motifs utilisés par StationMeteo.extraire_donnees_avec_regex(), même si d'autres sont enregistrés
+NOMS_MOTIFS_METEO = ("temperatures", "humidites", "pressions", "dates", "heures")
+# Règles de REGLES_METEO vérifiées par StationMeteo.valider_coherence_donnees(), même si d'autres sont enregistrées
+NOMS_REGLES_COHERENCE = ("temperatures", "humidites", "coherence_pluie")
+# Catégories de lignes de StationMeteo.analyser_donnees_brutes() (une ligne peut en avoir plusieurs)
+CATEGORIES_LIGNES = ("commentaires", "temperatures", "alertes")
+
+
+def classer_lignes(lignes, retenues=None):
+    """
+    Compte en une passe les lignes non vides (une fois nettoyées) et, parmi elles, les
+    commentaires, les mesures de température et les alertes.
+
+    Args:
+        lignes (itérable de str): lignes brutes, sans fin de ligne
+        retenues (dict): catégorie -> liste (ou objet doté d'append()) qui reçoit les
+            lignes nettoyées de la catégorie ; les autres catégories sont seulement comptées
+
+    Returns:
+        dict: total_lignes, lignes_commentaires, lignes_temp, lignes_alertes
+    """
+    retenues = retenues or dict()
+    garder_commentaire, garder_temperature, garder_alerte = (
+        getattr(retenues.get(categorie), "append", None) for categorie in CATEGORIES_LIGNES)
+    total = commentaires = temperatures = alertes = 0
+    for ligne in lignes:
+        ligne = ligne.strip()
+        if not ligne:
+            continue
+        total += 1
+        if ligne[0] == "#":
+            commentaires += 1
+            if garder_commentaire:
+                garder_commentaire(ligne)
+        if ligne.endswith("°C") and "Température" in ligne:
+            temperatures += 1
+            if garder_temperature:
+                garder_temperature(ligne)
+        if "!" in ligne:
+            alertes += 1
+            if garder_alerte:
+                garder_alerte(ligne)
+    return {
+        "total_lignes": total,                # int: nombre total de lignes valides
+        "lignes_commentaires": commentaires,  # int: nombre de commentaires
+        "lignes_temp": temperatures,          # int: lignes de température
+        "lignes_alertes": alertes,            # int: lignes d'alertes
+    }
 
 
 class Mesure:
@@ -207,8 +262,13 @@ class Mesure:
 
 
 class StationMeteo:
-    def __init__(self):
-        self.mesures = []                # list[dict]
+    def __init__(self, retention=86_400, fenetre=None):
+        """
+        Args:
+            retention (int): nombre de mesures conservées (une journée à une mesure par seconde)
+            fenetre (int): dernières mesures couvertes par les tendances (toutes par défaut)
+        """
+        self.mesures = SerieMeteo(retention, fenetre)  # SerieMeteo: anneau borné de dict
         self.config = {}                 # dict
         self.villes_observees = set()    # set
         self.derniere_mesure = None      # None
@@ -247,6 +307,36 @@ class StationMeteo:
             return self.mesures[-1] if self.mesures else None
         return self.mesures[index]
 
+    def ajouter_mesure(self, mesure):
+        """Enregistre une mesure (dict temp, humidite, pression, ville, pluvieux) en O(1)"""
+        self.mesures.append(mesure)
+        self.villes_observees.add(mesure["ville"])
+        self.derniere_mesure = mesure
+        return len(self.mesures)
+
+    def analyser_tendances_station(self):
+        """
+        Tendances des dernières mesures de la station, en temps constant : agrégats
+        glissants de self.mesures (moyenne, minimum, maximum, pluies), sans parcourir l'historique
+        """
+        resume = self.mesures.resume()
+        if not resume["taille"]:
+            return {}
+
+        temperatures = resume["temp"]
+        tendances = {"echantillon_suffisant": resume["taille"] >= 5, "taille": resume["taille"]}
+        if tendances["echantillon_suffisant"] and temperatures["moyenne"] > 25:
+            tendances["periode_chaude"] = True
+        tendances.update(
+            temperature_moyenne=temperatures["moyenne"],    # float
+            temperature_min=temperatures["minimum"],        # float
+            temperature_max=temperatures["maximum"],        # float
+            humidite_moyenne=resume["humidite"]["moyenne"], # float
+            pression_moyenne=resume["pression"]["moyenne"], # float ou None
+            pluies=resume["pluies"],                        # int
+        )
+        return tendances
+
     def configurer_seuils(self, temp_min=None, temp_max=None):
         """Configure les seuils de la station ou garde les valeurs par défaut"""
         if temp_min is None:
@@ -258,6 +348,7 @@ class StationMeteo:
         return self.config
     
     @staticmethod
+    @instrumenter(elements=lambda donnees_brutes: len(donnees_brutes or ""))
     def analyser_donnees_brutes(donnees_brutes):
         """
         Analyse des données brutes et retourne un résumé avec détection de patterns.
@@ -275,30 +366,45 @@ class StationMeteo:
         if not donnees_brutes:
             return dict()
 
-        # Division en lignes individuelles
-        lignes = donnees_brutes.splitlines()  # list: sépare les lignes
-
-        # Nettoyage des lignes
-        lignes_nettoyees = [ligne.strip() for ligne in lignes]  # list: nettoyage des espaces
-        lignes_valides = [ligne for ligne in lignes_nettoyees if ligne]  # list: filtre les lignes non vides
-
-        # Détection de patterns avec différentes méthodes
-        commentaires = [ligne for ligne in lignes_valides if ligne.startswith("#")]  # list: commentaires
-        mesures_temperature = [ligne for ligne in lignes_valides if "Température" in ligne and ligne.endswith("°C")]  # list: températures
-        alertes = [ligne for ligne in lignes_valides if "!" in ligne]  # list: alertes
-
-        # Statistiques d'analyse
-        stats = {
-            "total_lignes": len(lignes_valides),      # int: nombre total de lignes valides
-            "lignes_commentaires": len(commentaires), # int: nombre de commentaires
-            "lignes_temp": len(mesures_temperature),  # int: lignes de température
-            "lignes_alertes": len(alertes),           # int: lignes d'alertes
-            "commentaires": commentaires,             # list: commentaires extraits
-            "temperatures": mesures_temperature,      # list: mesures de température
-            "alertes": alertes                        # list: alertes détectées
-        }
+        # Nettoyage, filtrage et détection de patterns en une seule passe sur les lignes
+        retenues = {categorie: [] for categorie in CATEGORIES_LIGNES}  # dict[str, list]
+        stats = classer_lignes(donnees_brutes.splitlines(), retenues)
+        stats["commentaires"] = retenues["commentaires"]  # list: commentaires extraits
+        stats["temperatures"] = retenues["temperatures"]  # list: mesures de température
+        stats["alertes"] = retenues["alertes"]            # list: alertes détectées
         return stats                                  # dict
     
+    @staticmethod
+    @instrumenter()
+    def analyser_flux_brut(source, conserver=0, echantillonnage="premiers", graine=None,
+                           taille_bloc=TAILLE_BLOC, encoding="utf-8"):
+        """
+        Version en flux de analyser_donnees_brutes() pour les journaux volumineux : la
+        source est lue ligne par ligne et, par défaut, seules les lignes sont comptées.
+
+        Args:
+            source: chemin de fichier, objet fichier ou itérable de morceaux str/bytes
+            conserver (int): nombre maximal de lignes gardées par catégorie (0 : aucune)
+            echantillonnage (str): "premiers" garde les premières lignes de chaque
+                catégorie, "reservoir" un échantillon uniforme de tout le journal
+            graine: graine du tirage de l'échantillonnage "reservoir"
+
+        Returns:
+            dict: les compteurs de analyser_donnees_brutes() et, si `conserver` > 0,
+            les listes commentaires, temperatures et alertes (au plus `conserver` lignes)
+
+        Exemple:
+            >>> StationMeteo.analyser_flux_brut(["# Paris\\nTempérature: 18.5°C\\n", "Alerte orage !\\n"])
+            {'total_lignes': 3, 'lignes_commentaires': 1, 'lignes_temp': 1, 'lignes_alertes': 1}
+        """
+        echantillons = {categorie: Echantillon(conserver, echantillonnage, graine) for categorie in CATEGORIES_LIGNES}
+        # Sans lignes à conserver, classer_lignes() ne fait que compter
+        retenues = echantillons if conserver else dict()
+        stats = classer_lignes(lire_lignes(source, taille_bloc, encoding), retenues)
+        for categorie, echantillon in retenues.items():
+            stats[categorie] = echantillon.elements  # list: lignes retenues
+        return stats
+
     # StationMeteo
     def configurer_station_interactive(self):
         """Configuration interactive de la station avec validation des entrées"""
@@ -349,42 +455,29 @@ class StationMeteo:
     
     # StationMeteo
     @staticmethod
+    @instrumenter(elements=lambda texte_donnees: len(texte_donnees or ""))
     def extraire_donnees_avec_regex(texte_donnees):
         """Extrait des données météorologiques avec des expressions régulières"""
         if not texte_donnees:
             return dict()
         
-        # Patterns pour différents types de données
-        patterns = {
-            # Températures : "18.5°C" ou "Température: 18.5°C"
-            "temperatures": re.findall(r"(?:Température:\s*)?(-?\d+(?:\.\d+)?)°C", texte_donnees),  # list
-            
-            # Humidité : "65%" ou "Humidité: 65%"
-            "humidites": re.findall(r"(?:Humidité:\s*)?(\d+)%", texte_donnees),  # list
-            
-            # Pressions : "1013 hPa" ou "Pression: 1013 hPa"
-            "pressions": re.findall(r"(?:Pression:\s*)?(\d+)\s*hPa", texte_donnees),  # list
-            
-            # Dates au format DD/MM/YYYY
-            "dates": re.findall(r"(\d{2}/\d{2}/\d{4})", texte_donnees),  # list
-            
-            # Heures au format HH:MM
-            "heures": re.findall(r"(\d{2}:\d{2})", texte_donnees),  # list
-        }
+        # Températures, humidités, pressions, dates et heures (voir MOTIFS_METEO),
+        # converties en float/int, avec des motifs compilés une seule fois
+        patterns = MOTIFS_METEO.extraire(texte_donnees, NOMS_MOTIFS_METEO)  # dict
         
-        # Conversion des types pour les valeurs numériques
         donnees_extraites = {
-            "temperatures": [float(temp) for temp in patterns["temperatures"]],  # list[float]
-            "humidites": [int(hum) for hum in patterns["humidites"]],            # list[int]
-            "pressions": [int(press) for press in patterns["pressions"]],        # list[int]
-            "dates": patterns["dates"],                                          # list[str]
-            "heures": patterns["heures"],                                        # list[str]
-            "total_mesures": len(patterns["temperatures"])                       # int
+            "temperatures": patterns["temperatures"],          # list[float]
+            "humidites": patterns["humidites"],                # list[int]
+            "pressions": patterns["pressions"],                # list[int]
+            "dates": patterns["dates"],                        # list[str]
+            "heures": patterns["heures"],                      # list[str]
+            "total_mesures": len(patterns["temperatures"])     # int
         }
         
         return donnees_extraites                     # dict
     
     # StationMeteo
+    @instrumenter()
     def generer_rapport_station(self):
         """Génère un rapport formaté de la station avec différentes techniques de formatage"""
         if not self.config:
@@ -427,33 +520,32 @@ class StationMeteo:
         return "\n".join(lignes_rapport)             # str: assemblage avec sauts de ligne
 
     # StationMeteo
+    @instrumenter(elements=lambda station, donnees_mesures: len(donnees_mesures or ()))
     def valider_coherence_donnees(self, donnees_mesures):
         """Valide la cohérence d'un lot de mesures avec expressions booléennes"""
         if not donnees_mesures:
             return {"toutes_valides": True, "details": "Aucune donnée"}
         
-        # Vérifications avec all()
-        toutes_temperatures_valides = all(-50 <= m["temp"] <= 60 for m in donnees_mesures)  # bool
-        toutes_humidites_valides = all(0 <= m["humidite"] <= 100 for m in donnees_mesures)  # bool
-        
-        # Vérifications avec any()
+        # Règles de cohérence vérifiées en un seul parcours (sans garder les indices fautifs)
+        rapport = REGLES_METEO.valider(donnees_mesures, NOMS_REGLES_COHERENCE, limite=0)
+        regles = rapport["regles"]  # dict
+
+        # Vérifications avec any(), arrêtées à la première mesure concernée
         au_moins_une_pluie = any(m["pluvieux"] for m in donnees_mesures)  # bool
         temperature_elevee = any(m["temp"] > 30 for m in donnees_mesures)  # bool
-        
-        # Combinaison all() + logique
-        coherence_pluie = all(not m["pluvieux"] or m["humidite"] > 60 for m in donnees_mesures)  # bool
-        
+
         return {
-            "toutes_valides": all([toutes_temperatures_valides, toutes_humidites_valides, coherence_pluie]),
+            "toutes_valides": rapport["valide"],
             "details": {
-                "temperatures": toutes_temperatures_valides,
-                "humidites": toutes_humidites_valides,
+                "temperatures": regles["temperatures"]["respectee"],
+                "humidites": regles["humidites"]["respectee"],
                 "presence_pluie": au_moins_une_pluie,
                 "temperature_elevee": temperature_elevee
             }
         }
 
     # StationMeteo  
+    @instrumenter(elements=lambda station, donnees_nouvelles: len(donnees_nouvelles or ()))
     def analyser_tendances_optimise(self, donnees_nouvelles):
         """Analyse optimisée des tendances avec l'opérateur walrus"""
         if not donnees_nouvelles:
@@ -482,6 +574,7 @@ class StationMeteo:
 
     # StationMeteo
     @staticmethod
+    @instrumenter(elements=lambda donnees_mesures: len(donnees_mesures or ()))
     def analyser_avec_operateurs_ternaires(donnees_mesures):
         """Utilisation des opérateurs ternaires et gestion de la précédence"""
         if not donnees_mesures:
@@ -518,12 +611,13 @@ class StationMeteo:
         return {"analyses": analyses}
 
 # Exemple d'utilisation
-donnees_test = [
-    {"temp": 28, "humidite": 75, "ville": "Paris", "pluvieux": True},
-    {"temp": 15, "humidite": 45, "ville": "Lyon", "pluvieux": False},
-    {"temp": 35, "humidite": 85, "ville": "Marseille", "pluvieux": False}
-]
-
-analyse = StationMeteo.analyser_avec_operateurs_ternaires(donnees_test)
-for a in analyse["analyses"]:
-    print(f"{a['ville']}: {a['classification']} (Score: {a['score']})")
+if __name__ == "__main__":
+    donnees_test = [
+        {"temp": 28, "humidite": 75, "ville": "Paris", "pluvieux": True},
+        {"temp": 15, "humidite": 45, "ville": "Lyon", "pluvieux": False},
+        {"temp": 35, "humidite": 85, "ville": "Marseille", "pluvieux": False}
+    ]
+
+    analyse = StationMeteo.analyser_avec_operateurs_ternaires(donnees_test)
+    for a in analyse["analyses"]:
+        print(f"{a['ville']}: {a['classification']} (Score: {a['score']})")
@@ -0,0 +1,251 @@
+"""
+Esquisses - Structures probabilistes à mémoire bornée pour TextAnalyzer
+HyperLogLog estime le nombre de mots distincts, MotsFrequents les mots les plus fréquents.
+Les deux sont fusionnables (analyse par tranches) et sérialisables en octets.
+Echantillon garde un nombre borné d'éléments d'un flux (les premiers ou un réservoir).
+"""
+
+import math
+import random
+import struct
+import sys
+from array import array
+from collections import Counter
+from hashlib import blake2b
+
+
+def hacher(mot, taille=8):
+    """Empreinte stable d'un mot (contrairement à hash(), identique d'un processus à l'autre)"""
+    return int.from_bytes(blake2b(mot.encode("utf-8", "surrogatepass"), digest_size=taille).digest(), "big")
+
+
+def vers_petit_boutiste(compteurs):
+    """Les compteurs sont sérialisés en petit-boutiste quelle que soit la machine (opération involutive)"""
+    if sys.byteorder == "big":
+        compteurs = array(compteurs.typecode, compteurs)
+        compteurs.byteswap()
+    return compteurs
+
+
+class HyperLogLog:
+    """
+    Estimation du nombre d'éléments distincts avec 2**precision registres d'un octet.
+
+    L'erreur relative typique vaut 1.04 / sqrt(2**precision) : environ 0.8 % avec
+    la précision 14 par défaut, pour 16 Ko de mémoire quel que soit le nombre de mots.
+
+    Exemple:
+        >>> esquisse = HyperLogLog()
+        >>> esquisse.update(["le", "la", "le"])
+        >>> esquisse.estimer()
+        2
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("La précision doit être comprise entre 4 et 18")
+        self.precision = precision                      # int
+        self.registres = bytearray(1 << precision)      # bytearray
+
+    @classmethod
+    def depuis_erreur(cls, erreur):
+        """Crée l'esquisse la plus petite dont l'erreur relative typique ne dépasse pas `erreur`"""
+        precision = math.ceil(math.log2((1.04 / erreur) ** 2))
+        return cls(min(max(precision, 4), 18))
+
+    def update(self, elements):
+        """Ajoute des chaînes (même interface que set.update)"""
+        decalage = 64 - self.precision
+        masque = (1 << decalage) - 1
+        registres = self.registres
+        for element in set(elements):
+            empreinte = hacher(element)
+            index = empreinte >> decalage
+            # Rang du premier bit à 1 dans les bits restants
+            rang = decalage - (empreinte & masque).bit_length() + 1
+            if rang > registres[index]:
+                registres[index] = rang
+
+    def estimer(self):
+        """Retourne le nombre estimé d'éléments distincts"""
+        m = len(self.registres)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimation = alpha * m * m / sum(2.0 ** -registre for registre in self.registres)
+
+        registres_vides = self.registres.count(0)
+        if estimation <= 2.5 * m and registres_vides:
+            # Petites cardinalités : comptage linéaire, plus précis
+            estimation = m * math.log(m / registres_vides)
+        return round(estimation)
+
+    def fusionner(self, autre):
+        """Ajoute les éléments vus par `autre` (même précision)"""
+        if autre.precision != self.precision:
+            raise ValueError("Impossible de fusionner des esquisses de précisions différentes")
+        self.registres = bytearray(map(max, self.registres, autre.registres))
+        return self
+
+    def copie(self):
+        esquisse = HyperLogLog(self.precision)
+        esquisse.registres[:] = self.registres
+        return esquisse
+
+    def vers_octets(self):
+        return bytes([self.precision]) + bytes(self.registres)
+
+    @classmethod
+    def depuis_octets(cls, octets):
+        esquisse = cls(octets[0])
+        if len(octets) != 1 + len(esquisse.registres):
+            raise ValueError("Données HyperLogLog tronquées")
+        esquisse.registres[:] = octets[1:]
+        return esquisse
+
+
+class MotsFrequents:
+    """
+    Les `k` mots les plus fréquents, estimés avec un Count-Min Sketch de largeur x profondeur compteurs.
+
+    Chaque compte est surestimé d'au plus 2 * total / largeur avec une probabilité
+    d'au moins 1 - 2**-profondeur. Seuls les `k` meilleurs candidats sont conservés.
+
+    Exemple:
+        >>> frequents = MotsFrequents(k=2)
+        >>> frequents.update("le chat et le chien et le loup".split())
+        >>> frequents.plus_frequents()
+        [('le', 3), ('et', 2)]
+    """
+
+    ENTETE = struct.Struct("<4sIII")  # signature, k, largeur, profondeur
+    SIGNATURE = b"CMS1"
+
+    def __init__(self, k=10, largeur=2048, profondeur=4):
+        self.k = k                              # int
+        self.largeur = largeur                  # int
+        self.profondeur = profondeur            # int
+        self.compteurs = array("Q", bytes(8 * largeur * profondeur))  # array: une ligne par fonction de hachage
+        self.candidats = dict()                 # dict: mot -> compte estimé
+        self._seuil = 0                         # int: plus petit compte parmi les candidats
+
+    def _positions(self, mot):
+        empreinte = hacher(mot, taille=16)
+        h1, h2 = empreinte >> 64, (empreinte & 0xFFFFFFFFFFFFFFFF) | 1
+        return [ligne * self.largeur + (h1 + ligne * h2) % self.largeur for ligne in range(self.profondeur)]
+
+    def estimer(self, mot):
+        """Compte estimé d'un mot (jamais inférieur au compte réel)"""
+        return min(self.compteurs[position] for position in self._positions(mot))
+
+    def update(self, mots):
+        """Ajoute des mots ; les doublons d'un même appel sont regroupés avant le hachage"""
+        compteurs = self.compteurs
+        for mot, nombre in Counter(mots).items():
+            positions = self._positions(mot)
+            for position in positions:
+                compteurs[position] += nombre
+            self._proposer(mot, min(compteurs[position] for position in positions))
+
+    def _proposer(self, mot, compte):
+        if mot in self.candidats or len(self.candidats) < self.k:
+            self.candidats[mot] = compte
+        elif compte > self._seuil:
+            del self.candidats[min(self.candidats, key=self.candidats.get)]
+            self.candidats[mot] = compte
+        else:
+            return
+        if len(self.candidats) == self.k:
+            self._seuil = min(self.candidats.values())
+
+    def plus_frequents(self):
+        """Liste des (mot, compte estimé), du plus fréquent au moins fréquent"""
+        return sorted(self.candidats.items(), key=lambda candidat: (-candidat[1], candidat[0]))
+
+    def fusionner(self, autre):
+        """Ajoute les mots vus par `autre` (mêmes dimensions)"""
+        if (autre.largeur, autre.profondeur) != (self.largeur, self.profondeur):
+            raise ValueError("Impossible de fusionner des esquisses de dimensions différentes")
+        self.compteurs = array("Q", map(sum, zip(self.compteurs, autre.compteurs)))
+        mots = set(self.candidats) | set(autre.candidats)
+        self.candidats = dict()
+        self._seuil = 0
+        for mot in mots:
+            self._proposer(mot, self.estimer(mot))
+        return self
+
+    def copie(self):
+        esquisse = MotsFrequents(self.k, self.largeur, self.profondeur)
+        esquisse.compteurs = array("Q", self.compteurs)
+        esquisse.candidats = dict(self.candidats)
+        esquisse._seuil = self._seuil
+        return esquisse
+
+    def vers_octets(self):
+        # Les mots issus de split() ne contiennent jamais de "\n"
+        entete = self.ENTETE.pack(self.SIGNATURE, self.k, self.largeur, self.profondeur)
+        return entete + vers_petit_boutiste(self.compteurs).tobytes() + "\n".join(self.candidats).encode("utf-8")
+
+    @classmethod
+    def depuis_octets(cls, octets):
+        signature, k, largeur, profondeur = cls.ENTETE.unpack_from(octets)
+        if signature != cls.SIGNATURE:
+            raise ValueError("Données MotsFrequents invalides")
+        esquisse = cls(k, largeur, profondeur)
+        debut = cls.ENTETE.size
+        fin = debut + 8 * largeur * profondeur
+        esquisse.compteurs = vers_petit_boutiste(array("Q", octets[debut:fin]))
+        mots = octets[fin:].decode("utf-8")
+        for mot in mots.split("\n") if mots else []:
+            esquisse._proposer(mot, esquisse.estimer(mot))
+        return esquisse
+
+
+class Echantillon:
+    """
+    Au plus `taille` éléments d'un flux : les premiers reçus ("premiers"), ou un
+    échantillon uniforme de tout le flux ("reservoir", algorithme L : le rang du
+    prochain élément retenu est tiré d'avance, sans tirage pour les autres).
+
+    Exemple:
+        >>> echantillon = Echantillon(3)
+        >>> for nombre in range(10):
+        ...     echantillon.append(nombre)
+        >>> echantillon.elements, echantillon.vus
+        ([0, 1, 2], 10)
+    """
+
+    MODES = ("premiers", "reservoir")
+
+    def __init__(self, taille, mode="premiers", graine=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Mode d'échantillonnage inconnu : {mode!r} (attendu : {', '.join(self.MODES)})")
+        if taille < 0:
+            raise ValueError(f"La taille de l'échantillon doit être positive, reçu {taille}")
+        self.taille = taille                        # int
+        self.mode = mode                            # str
+        self.elements = []                          # list: éléments retenus
+        self.vus = 0                                # int: éléments reçus
+        self._aleatoire = random.Random(graine)
+        self._poids = 1.0                           # float
+        self._prochain = math.inf                   # int: rang du prochain élément retenu une fois plein
+
+    def _tirer_prochain(self):
+        self._poids *= math.exp(math.log(1.0 - self._aleatoire.random()) / self.taille)
+        saut = math.log(1.0 - self._aleatoire.random()) / math.log1p(-self._poids) if 0.0 < self._poids < 1.0 else math.inf
+        self._prochain = self.vus + math.floor(saut) + 1
+
+    def append(self, element):
+        self.vus += 1
+        if len(self.elements) < self.taille:
+            self.elements.append(element)
+            if len(self.elements) == self.taille and self.mode == "reservoir":
+                self._tirer_prochain()
+        elif self.vus == self._prochain:
+            self.elements[self._aleatoire.randrange(self.taille)] = element
+            self._tirer_prochain()
@@ -0,0 +1,290 @@
+"""
+Flotte - Agrégats météo d'un ensemble de stations, interrogeables par ville et par station
+Les mesures sont résumées par couple (station, ville) dans des AgregatMeteo fusionnables ;
+les index par station, par ville et par groupe de stations sont tenus à jour à chaque
+fusion. Une requête ("dernière mesure à Lyon", "humidité moyenne des stations côtières")
+lit ou fusionne quelques agrégats, sans parcourir les mesures. L'ingestion peut être
+répartie sur plusieurs processus : chaque paquet ne contient que les mesures d'un groupe
+de stations et est résumé par le premier processus libre, puis fusionné dans la flotte.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+from esquisses import hacher
+from main import map_borne
+
+
+TAILLE_PAQUET_FLOTTE = 5000  # mesures envoyées ensemble à un processus par Flotte.ingerer()
+
+
+class AgregatMeteo:
+    """
+    Nombre de mesures et de mesures pluvieuses, somme, minimum et maximum de chaque
+    grandeur et dernière mesure reçue (selon son rang d'arrivée). Deux agrégats se
+    fusionnent en O(1), dans n'importe quel ordre.
+    """
+
+    __slots__ = ("nombre", "pluies", "nombre_pression",
+                 "somme_temp", "min_temp", "max_temp",
+                 "somme_humidite", "min_humidite", "max_humidite",
+                 "somme_pression", "min_pression", "max_pression",
+                 "rang_derniere", "station_derniere", "derniere")
+
+    def __init__(self):
+        self.nombre = 0                 # int
+        self.pluies = 0                 # int
+        self.nombre_pression = 0        # int: mesures avec une pression
+        self.somme_temp = 0.0           # float
+        self.min_temp = math.inf        # float ou int
+        self.max_temp = -math.inf       # float ou int
+        self.somme_humidite = 0         # int
+        self.min_humidite = math.inf    # int
+        self.max_humidite = -math.inf   # int
+        self.somme_pression = 0.0       # float
+        self.min_pression = math.inf    # float ou int
+        self.max_pression = -math.inf   # float ou int
+        self.rang_derniere = -1         # int: rang d'arrivée de la dernière mesure
+        self.station_derniere = None    # identifiant de station
+        self.derniere = None            # dict
+
+    def ajouter(self, rang, station, mesure):
+        """Ajoute une mesure (dict temp, humidite, pression, ville, pluvieux), arrivée en position `rang`"""
+        temp = mesure["temp"]
+        humidite = mesure["humidite"]
+        pression = mesure.get("pression")
+        self.nombre += 1
+        self.somme_temp += temp
+        if temp < self.min_temp:
+            self.min_temp = temp
+        if temp > self.max_temp:
+            self.max_temp = temp
+        self.somme_humidite += humidite
+        if humidite < self.min_humidite:
+            self.min_humidite = humidite
+        if humidite > self.max_humidite:
+            self.max_humidite = humidite
+        if pression is not None:
+            self.nombre_pression += 1
+            self.somme_pression += pression
+            if pression < self.min_pression:
+                self.min_pression = pression
+            if pression > self.max_pression:
+                self.max_pression = pression
+        if mesure["pluvieux"]:
+            self.pluies += 1
+        if rang > self.rang_derniere:
+            self.rang_derniere = rang
+            self.station_derniere = station
+            self.derniere = mesure
+
+    def fusionner(self, autre, decalage=0):
+        """Ajoute les mesures résumées par `autre` ; leurs rangs sont augmentés de `decalage`"""
+        self.nombre += autre.nombre
+        self.pluies += autre.pluies
+        self.nombre_pression += autre.nombre_pression
+        self.somme_temp += autre.somme_temp
+        self.min_temp = min(self.min_temp, autre.min_temp)
+        self.max_temp = max(self.max_temp, autre.max_temp)
+        self.somme_humidite += autre.somme_humidite
+        self.min_humidite = min(self.min_humidite, autre.min_humidite)
+        self.max_humidite = max(self.max_humidite, autre.max_humidite)
+        self.somme_pression += autre.somme_pression
+        self.min_pression = min(self.min_pression, autre.min_pression)
+        self.max_pression = max(self.max_pression, autre.max_pression)
+        if autre.derniere is not None and autre.rang_derniere + decalage > self.rang_derniere:
+            self.rang_derniere = autre.rang_derniere + decalage
+            self.station_derniere = autre.station_derniere
+            self.derniere = autre.derniere
+        return self
+
+    def copie(self):
+        return AgregatMeteo().fusionner(self)
+
+    def moyenne(self, metrique):
+        """Moyenne de `metrique` (temp, humidite, pression), None sans valeur"""
+        nombre = self.nombre_pression if metrique == "pression" else self.nombre
+        return getattr(self, f"somme_{metrique}") / nombre if nombre else None
+
+    def minimum(self, metrique):
+        nombre = self.nombre_pression if metrique == "pression" else self.nombre
+        return getattr(self, f"min_{metrique}") if nombre else None
+
+    def maximum(self, metrique):
+        nombre = self.nombre_pression if metrique == "pression" else self.nombre
+        return getattr(self, f"max_{metrique}") if nombre else None
+
+    def resume(self):
+        """Taille, pluies, moyenne, minimum et maximum par grandeur, et dernière mesure (comme SerieMeteo.resume())"""
+        resume = {"taille": self.nombre, "pluies": self.pluies}  # dict
+        for metrique in ("temp", "humidite", "pression"):
+            resume[metrique] = {
+                "moyenne": self.moyenne(metrique),   # float ou None
+                "minimum": self.minimum(metrique),   # float, int ou None
+                "maximum": self.maximum(metrique),   # float, int ou None
+            }
+        resume["derniere"] = self.derniere           # dict ou None
+        resume["station_derniere"] = self.station_derniere
+        return resume
+
+
+def agreger_paquet(paquet):
+    """Résume une liste de (rang, station, mesure) : dict (station, ville) -> AgregatMeteo"""
+    cellules = dict()
+    for rang, station, mesure in paquet:
+        cle = (station, mesure["ville"])
+        agregat = cellules.get(cle)
+        if agregat is None:
+            agregat = cellules[cle] = AgregatMeteo()
+        agregat.ajouter(rang, station, mesure)
+    return cellules
+
+
+def paquets_par_station(mesures, premier_rang, nombre_shards, taille_paquet=TAILLE_PAQUET_FLOTTE):
+    """
+    Découpe un flux de (station, mesure) en paquets de (rang, station, mesure) : chaque
+    station appartient à un seul des `nombre_shards` groupes (selon une empreinte stable
+    de son identifiant) et un paquet ne contient que des stations du même groupe.
+    """
+    tampons = [[] for _ in range(nombre_shards)]
+    shards = dict()   # dict: station -> groupe
+    for rang, (station, mesure) in enumerate(mesures, premier_rang):
+        shard = shards.get(station)
+        if shard is None:
+            shard = shards[station] = hacher(str(station)) % nombre_shards
+        tampon = tampons[shard]
+        tampon.append((rang, station, mesure))
+        if len(tampon) >= taille_paquet:
+            yield tampon
+            tampons[shard] = []
+    yield from (tampon for tampon in tampons if tampon)
+
+
+class Flotte:
+    """
+    Agrégats des mesures de nombreuses stations, indexés par station, par ville et par groupe.
+
+    Exemple:
+        >>> flotte = Flotte()
+        >>> flotte.ajouter_station("brest-1", groupes=["cotiere"])
+        >>> flotte.ingerer([("brest-1", {"temp": 14.0, "humidite": 82, "ville": "Brest", "pluvieux": True}),
+        ...                 ("lyon-2", {"temp": 21.5, "humidite": 55, "ville": "Lyon", "pluvieux": False}),
+        ...                 ("lyon-1", {"temp": 20.5, "humidite": 60, "ville": "Lyon", "pluvieux": False})])
+        >>> flotte.derniere_mesure(ville="Lyon")["temp"], flotte.moyenne("humidite", groupe="cotiere")
+        (20.5, 82.0)
+    """
+
+    def __init__(self):
+        self.cellules = dict()            # dict: (station, ville) -> AgregatMeteo
+        self.par_station = dict()         # dict: station -> AgregatMeteo
+        self.par_ville = dict()           # dict: ville -> AgregatMeteo
+        self.villes_par_station = dict()  # dict: station -> set[str]
+        self.stations_par_ville = dict()  # dict: ville -> set
+        self.groupes = dict()             # dict: groupe -> set des stations
+        self.total = 0                    # int: mesures reçues (rang de la prochaine)
+
+    def ajouter_station(self, station, groupes=()):
+        """Déclare une station et les groupes (côtière, montagne...) auxquels elle appartient"""
+        self.villes_par_station.setdefault(station, set())
+        for groupe in groupes:
+            self.groupes.setdefault(groupe, set()).add(station)
+
+    def _integrer(self, cellules, decalage=0):
+        """Fusionne des agrégats par (station, ville) dans les cellules et les index"""
+        for (station, ville), agregat in cellules.items():
+            for index, cle in ((self.cellules, (station, ville)), (self.par_station, station), (self.par_ville, ville)):
+                existant = index.get(cle)
+                if existant is None:
+                    index[cle] = AgregatMeteo().fusionner(agregat, decalage)
+                else:
+                    existant.fusionner(agregat, decalage)
+            self.villes_par_station.setdefault(station, set()).add(ville)
+            self.stations_par_ville.setdefault(ville, set()).add(station)
+
+    def ajouter_mesure(self, station, mesure):
+        """Ajoute une mesure (dict) de `station`, en O(1)"""
+        self._integrer(agreger_paquet([(self.total, station, mesure)]))
+        self.total += 1
+
+    def ingerer(self, mesures, processus=None, taille_paquet=TAILLE_PAQUET_FLOTTE):
+        """
+        Ajoute un flux de (station, mesure), dans l'ordre d'arrivée.
+
+        Args:
+            mesures (itérable de (station, dict)): mesures de toutes les stations
+            processus (int): nombre de processus ; les stations sont réparties en autant
+                de groupes et chaque paquet (d'un seul groupe) est résumé par un processus,
+                puis fusionné ici (au plus deux paquets en attente par processus)
+            taille_paquet (int): mesures par paquet
+        """
+        paquets = paquets_par_station(mesures, self.total, processus or 1, taille_paquet)
+
+        def integrer(resultats):
+            for cellules in resultats:
+                self._integrer(cellules)
+                self.total += sum(agregat.nombre for agregat in cellules.values())
+
+        if not processus or processus <= 1:
+            integrer(map(agreger_paquet, paquets))
+        else:
+            with ProcessPoolExecutor(max_workers=processus) as executeur:
+                integrer(map_borne(executeur, agreger_paquet, paquets, 2 * processus))
+
+    @classmethod
+    def depuis_stations(cls, stations):
+        """Flotte des mesures conservées par des StationMeteo (dict identifiant -> station)"""
+        flotte = cls()
+        for identifiant, station in stations.items():
+            flotte.ajouter_station(identifiant)
+            flotte.ingerer((identifiant, mesure) for mesure in station.mesures)
+        return flotte
+
+    def fusionner(self, autre):
+        """
+        Ajoute les agrégats et les groupes de `autre` (par exemple une flotte remplie dans
+        un autre processus) ; ses mesures sont considérées comme arrivées après celles de `self`.
+        """
+        self._integrer(autre.cellules, decalage=self.total)
+        self.total += autre.total
+        for station in autre.villes_par_station:
+            self.villes_par_station.setdefault(station, set())
+        for groupe, stations in autre.groupes.items():
+            self.groupes.setdefault(groupe, set()).update(stations)
+        return self
+
+    def agregat(self, ville=None, station=None, groupe=None):
+        """
+        Agrégat (nouvel objet) des mesures sélectionnées : toutes, celles d'une ville,
+        d'une station ou d'un groupe de stations, ou leur intersection. Seuls les
+        agrégats déjà calculés sont fusionnés, les mesures ne sont pas relues.
+        """
+        if groupe is None and station is None:
+            if ville is not None:
+                agregats = [self.par_ville.get(ville)]
+            else:
+                agregats = self.par_ville.values()
+        else:
+            stations = [station] if station is not None else self.groupes.get(groupe, ())
+            if station is not None and groupe is not None and station not in self.groupes.get(groupe, ()):
+                stations = []
+            if ville is None:
+                agregats = [self.par_station.get(identifiant) for identifiant in stations]
+            else:
+                agregats = [self.cellules.get((identifiant, ville)) for identifiant in stations]
+        return reduce(AgregatMeteo.fusionner, (agregat for agregat in agregats if agregat is not None), AgregatMeteo())
+
+    def resume(self, ville=None, station=None, groupe=None):
+        """AgregatMeteo.resume() des mesures sélectionnées (voir agregat())"""
+        return self.agregat(ville, station, groupe).resume()
+
+    def moyenne(self, metrique, ville=None, station=None, groupe=None):
+        """Moyenne de `metrique` (temp, humidite, pression) sur la sélection, None sans valeur"""
+        return self.agregat(ville, station, groupe).moyenne(metrique)
+
+    def derniere_mesure(self, ville=None, station=None, groupe=None):
+        """Dernière mesure reçue (dict) dans la sélection, None s'il n'y en a pas"""
+        if groupe is None and (ville is None) != (station is None):
+            agregat = self.par_ville.get(ville) if station is None else self.par_station.get(station)
+            return agregat.derniere if agregat is not None else None
+        return self.agregat(ville, station, groupe).derniere
@@ -0,0 +1,122 @@
+"""
+Index de mots - Filtrage programmatique des mots d'un texte
+L'index est construit une fois par texte ; chaque filtre ne parcourt ensuite
+que les mots qu'il retourne, au lieu de tous les mots du texte.
+"""
+
+from heapq import merge
+from itertools import chain
+
+
+class IndexMots:
+    """
+    Index des mots d'un texte : positions de chaque mot distinct, mots groupés
+    par longueur, arbre des préfixes et liste des mots commençant par une majuscule.
+
+    Les critères sont ceux de TextAnalyzer.extraire_mots_input() et se combinent ;
+    les résultats sont produits au fur et à mesure, dans l'ordre du texte.
+
+    Exemple:
+        >>> index = IndexMots("Le chat et le Chien chassent".split())
+        >>> list(index.filtrer(longueur_min=4, prefixe="ch"))
+        ['chat', 'chassent']
+        >>> index.compter(majuscule=True)
+        2
+    """
+
+    FIN = ""  # clé d'un nœud de l'arbre des préfixes où se termine un mot
+
+    def __init__(self, mots):
+        self.mots = mots                # list[str]: mots dans l'ordre du texte
+        self.positions = dict()         # dict: mot -> list[int] de ses positions, croissantes
+        for position, mot in enumerate(mots):
+            if mot in self.positions:
+                self.positions[mot].append(position)
+            else:
+                self.positions[mot] = [position]
+
+        self.par_longueur = dict()      # dict: longueur -> list[str] des mots distincts
+        self.arbre = dict()             # dict: caractère -> sous-arbre, FIN -> mot
+        self.majuscules = []            # list[str]: mots distincts commençant par une majuscule
+        for mot in self.positions:
+            self.par_longueur.setdefault(len(mot), []).append(mot)
+            noeud = self.arbre
+            for caractere in mot:
+                noeud = noeud.setdefault(caractere, dict())
+            noeud[self.FIN] = mot
+            if mot[0].isupper():
+                self.majuscules.append(mot)
+        self.longueurs = sorted(self.par_longueur)  # list[int]
+
+    def _avec_prefixe(self, prefixe):
+        noeud = self.arbre
+        for caractere in prefixe:
+            if caractere not in noeud:
+                return
+            noeud = noeud[caractere]
+        a_visiter = [noeud]
+        while a_visiter:
+            noeud = a_visiter.pop()
+            for caractere, suite in noeud.items():
+                if caractere == self.FIN:
+                    yield suite
+                else:
+                    a_visiter.append(suite)
+
+    def _par_longueurs(self, longueur_min, longueur_max):
+        return chain.from_iterable(
+            self.par_longueur[longueur] for longueur in self.longueurs
+            if (longueur_min is None or longueur >= longueur_min)
+            and (longueur_max is None or longueur <= longueur_max)
+        )
+
+    def mots_distincts(self, longueur_min=None, longueur_max=None, prefixe=None, majuscule=None):
+        """
+        Produit les mots distincts qui vérifient tous les critères, sans ordre particulier.
+
+        Le parcours part de l'index le plus sélectif disponible (préfixe, puis majuscules,
+        puis longueurs) et ne teste les autres critères que sur ces candidats.
+        """
+        if prefixe:
+            candidats = self._avec_prefixe(prefixe)
+            prefixe = None
+        elif majuscule:
+            candidats = self.majuscules
+            majuscule = None
+        elif longueur_min is not None or longueur_max is not None:
+            candidats = self._par_longueurs(longueur_min, longueur_max)
+            longueur_min = longueur_max = None
+        else:
+            candidats = self.positions
+
+        for mot in candidats:
+            if longueur_min is not None and len(mot) < longueur_min:
+                continue
+            if longueur_max is not None and len(mot) > longueur_max:
+                continue
+            if prefixe and not mot.startswith(prefixe):
+                continue
+            if majuscule is not None and mot[0].isupper() != majuscule:
+                continue
+            yield mot
+
+    def filtrer(self, longueur_min=None, longueur_max=None, prefixe=None, majuscule=None):
+        """
+        Produit les occurrences des mots qui vérifient tous les critères, dans l'ordre du texte.
+
+        Args:
+            longueur_min (int): longueur minimale (incluse)
+            longueur_max (int): longueur maximale (incluse)
+            prefixe (str): début du mot, sensible à la casse
+            majuscule (bool): True pour les mots commençant par une majuscule, False pour les autres
+        """
+        positions = [self.positions[mot] for mot in
+                     self.mots_distincts(longueur_min, longueur_max, prefixe, majuscule)]
+        mots = self.mots
+        for position in merge(*positions):
+            yield mots[position]
+
+    def compter(self, longueur_min=None, longueur_max=None, prefixe=None, majuscule=None):
+        """Nombre d'occurrences retournées par filtrer() avec les mêmes critères"""
+        return sum(len(self.positions[mot]) for mot in
+                   self.mots_distincts(longueur_min, longueur_max, prefixe, majuscule))
@@ -0,0 +1,174 @@
+"""
+Instrumentation - Mesures optionnelles des analyses de TextAnalyzer et StationMeteo
+Nombre d'appels, temps, éléments traités (caractères, pas octets) et allocations par méthode, exposés en
+dictionnaire, à un rappel (traceur externe) ou au format texte de Prometheus.
+
+Désactivée par défaut : une méthode instrumentée ne coûte alors qu'un appel de
+fonction et un test, ce qui permet de laisser le décorateur en place.
+"""
+
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+
+class Metriques:
+    """Compteurs cumulés par méthode, partageables entre threads"""
+
+    COMPTEURS = {
+        "appels": "Nombre d'appels",
+        "erreurs": "Nombre d'appels terminés par une exception",
+        "secondes": "Temps total passé dans la méthode (appels imbriqués inclus)",
+        "elements": "Éléments traités : caractères (et non octets) pour un texte, éléments pour une liste",
+        "allocations": "Somme des pics de mémoire allouée par appel, en octets (si activé)",
+    }
+
+    def __init__(self):
+        self.methodes = dict()           # dict: nom -> dict des COMPTEURS
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom, secondes, elements=0, allocations=0, erreur=False):
+        with self._verrou:
+            if nom not in self.methodes:
+                self.methodes[nom] = dict.fromkeys(self.COMPTEURS, 0)
+            compteurs = self.methodes[nom]
+            compteurs["appels"] += 1
+            compteurs["erreurs"] += erreur
+            compteurs["secondes"] += secondes
+            compteurs["elements"] += elements
+            compteurs["allocations"] += allocations
+
+    def vers_dict(self):
+        """Copie des compteurs : nom de méthode -> dict"""
+        with self._verrou:
+            return {nom: dict(compteurs) for nom, compteurs in self.methodes.items()}
+
+    def vers_prometheus(self, prefixe="analyseur"):
+        """Compteurs au format d'exposition texte de Prometheus, un label `methode` par méthode"""
+        methodes = self.vers_dict()
+        lignes = []
+        for compteur, description in self.COMPTEURS.items():
+            metrique = f"{prefixe}_{compteur}_total"
+            lignes.append(f"# HELP {metrique} {description}")
+            lignes.append(f"# TYPE {metrique} counter")
+            for nom, compteurs in sorted(methodes.items()):
+                lignes.append(f'{metrique}{{methode="{nom}"}} {compteurs[compteur]}')
+        return "\n".join(lignes) + "\n"
+
+    def reinitialiser(self):
+        with self._verrou:
+            self.methodes.clear()
+
+
+# (Metriques, rappel, allocations) quand l'instrumentation est active, sinon None
+_active = None
+# True si tracemalloc a été démarré par activer() : desactiver() ne l'arrête que dans ce cas
+_trace_demarree = False
+
+
+def activer(metriques=None, rappel=None, allocations=False):
+    """
+    Active l'instrumentation de toutes les méthodes décorées par instrumenter().
+
+    Args:
+        metriques (Metriques): compteurs à alimenter (nouveaux par défaut)
+        rappel (callable): appelé après chaque appel avec un dict
+            {"methode", "secondes", "elements", "allocations", "erreur"}
+        allocations (bool): mesure aussi le pic de mémoire de chaque appel avec
+            tracemalloc, ce qui ralentit nettement l'exécution
+
+    Returns:
+        Metriques: les compteurs alimentés
+    """
+    global _active, _trace_demarree
+    metriques = metriques if metriques is not None else Metriques()
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _trace_demarree = True
+    _active = (metriques, rappel, allocations)
+    return metriques
+
+
+def desactiver():
+    global _active, _trace_demarree
+    if _trace_demarree and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_demarree = False
+    _active = None
+
+
+def est_active():
+    return _active is not None
+
+
+def instrumenter(elements=None, elements_resultat=None):
+    """
+    Décorateur des méthodes mesurées, nommées par leur __qualname__ (Classe.methode).
+
+    Args:
+        elements (callable): reçoit les arguments de l'appel et retourne le nombre
+            d'éléments traités (caractères d'un texte, éléments d'une liste)
+        elements_resultat (callable): à la place de `elements`, reçoit la valeur retournée
+            (constructeurs en flux, dont la source est consommée par l'appel)
+
+    Exemple:
+        >>> @instrumenter(elements=len)
+        ... def compter_espaces(texte):
+        ...     return texte.count(" ")
+        >>> metriques = activer()
+        >>> compter_espaces("a b c")
+        2
+        >>> metriques.vers_dict()["compter_espaces"]["elements"]
+        5
+        >>> desactiver()
+    """
+    def decorateur(fonction):
+        nom = fonction.__qualname__
+
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if _active is None:
+                return fonction(*args, **kwargs)
+            return _mesurer(nom, fonction, elements, elements_resultat, args, kwargs)
+        return enveloppe
+    return decorateur
+
+
+def _mesurer(nom, fonction, elements, elements_resultat, args, kwargs):
+    metriques, rappel, allocations = _active
+    if allocations:
+        avant, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    erreur = False
+    debut = time.perf_counter()
+    try:
+        resultat = fonction(*args, **kwargs)
+        return resultat
+    except BaseException:
+        erreur = True
+        raise
+    finally:
+        secondes = time.perf_counter() - debut
+        # Les appels imbriqués remettent le pic à zéro : seul le dernier segment est vu
+        pic = tracemalloc.get_traced_memory()[1] - avant if allocations else 0
+        try:
+            if elements_resultat is not None:
+                nombre = 0 if erreur else elements_resultat(resultat)
+            else:
+                nombre = elements(*args, **kwargs) if elements is not None else 0
+        except Exception:
+            # Des arguments invalides font aussi échouer `elements` : l'erreur de `fonction` est celle qui remonte
+            if not erreur:
+                raise
+            nombre = 0
+        evenement = {
+            "methode": nom,
+            "secondes": secondes,
+            "elements": nombre,
+            "allocations": max(pic, 0),
+            "erreur": erreur,
+        }
+        metriques.enregistrer(nom, secondes, nombre, evenement["allocations"], erreur)
+        if rappel is not None:
+            rappel(evenement)
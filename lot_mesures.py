@@ -0,0 +1,173 @@
+"""
+Lot de mesures - Mesures météorologiques rangées en colonnes pour les analyser par millions
+MesureBatch garde température, humidité, pression et pluie dans des array et code les
+villes par un entier. Chaque analyse de Mesure existe en version par colonnes : les
+analyses qui ne dépendent que de l'humidité ou de la ville sont calculées une fois par
+valeur distincte, les autres en une compréhension par colonne, sans objet par mesure.
+Élément par élément, les résultats sont ceux des méthodes de Mesure.
+"""
+
+from array import array
+from itertools import repeat
+from operator import attrgetter, itemgetter
+from types import SimpleNamespace
+
+from curse import Mesure
+from validation import REGLES_METEO
+
+
+def verifier_colonne(valeurs, types, nom, attendu):
+    """
+    Lève la TypeError de Mesure pour le premier élément de `valeurs` qui n'est pas une
+    instance de `types` ; les types sont vérifiés une fois par type distinct, pas par élément.
+    """
+    refuses = {type_valeur for type_valeur in set(map(type, valeurs)) if not issubclass(type_valeur, types)}
+    if refuses:
+        index, valeur = next((index, valeur) for index, valeur in enumerate(valeurs) if type(valeur) in refuses)
+        raise TypeError(f"{nom} doit être {attendu}, reçu {type(valeur).__name__} (mesure {index})")
+
+
+class MesureBatch:
+    def __init__(self, temperatures, humidites, pressions, villes, pluvieux):
+        """
+        Crée un lot de mesures à partir de colonnes de même longueur, avec les
+        vérifications de type de Mesure faites en une fois sur chaque colonne.
+        Args:
+            temperatures (séquence de float ou int): Températures en degrés Celsius
+            humidites (séquence de int): Taux d'humidité en pourcentage
+            pressions (séquence de int ou float): Pressions atmosphériques en hPa
+            villes (séquence de str): Villes des mesures
+            pluvieux (séquence de bool): Pluie ou non
+
+        Exemple:
+            >>> lot = MesureBatch([18.5, 22.3], [65, 78], [1013, 1008], ["Paris", "Lyon"], [False, True])
+            >>> lot.analyser_conditions_meteo()["agreable"]
+            [True, False]
+        """
+        colonnes = [valeurs if isinstance(valeurs, (list, tuple, array)) else list(valeurs)
+                    for valeurs in (temperatures, humidites, pressions, villes, pluvieux)]
+        if len(set(map(len, colonnes))) > 1:
+            raise ValueError(f"Les colonnes doivent avoir la même longueur, reçu {', '.join(map(str, map(len, colonnes)))}")
+        temperatures, humidites, pressions, villes, pluvieux = colonnes
+        verifier_colonne(temperatures, (int, float), "Température", "int ou float")
+        verifier_colonne(humidites, int, "Humidité", "int")
+        verifier_colonne(pressions, (int, float), "Pression", "int ou float")
+        verifier_colonne(villes, str, "Ville", "str")
+        verifier_colonne(pluvieux, bool, "Pluvieux", "bool")
+
+        self.temperatures = array("d", temperatures)     # array("d")
+        # Températures reçues en int : Mesure.analyser_temperature() les rend sans les convertir
+        self.temperatures_entieres = array("B", map(isinstance, temperatures, repeat(int)))  # array("B")
+        self.humidites = array("q", humidites)           # array("q")
+        self.pressions = array("q" if all(isinstance(pression, int) for pression in pressions) else "d",
+                               pressions)                # array("q") ou array("d")
+        index_villes = dict()
+        self.codes_villes = array("I", [index_villes.setdefault(ville, len(index_villes)) for ville in villes])
+        self.villes = list(index_villes)                 # list[str]: ville de chaque code
+        self.pluvieux = array("B", pluvieux)             # array("B")
+
+    @classmethod
+    def depuis_mesures(cls, mesures):
+        """Lot des objets Mesure de `mesures`"""
+        mesures = list(mesures)
+        return cls(*(list(map(attrgetter(nom), mesures))
+                     for nom in ("temperature", "humidite", "pression", "ville", "pluvieux")))
+
+    @classmethod
+    def depuis_dicts(cls, donnees_mesures):
+        """Lot de mesures au format dict de StationMeteo (temp, humidite, pression, ville, pluvieux)"""
+        donnees_mesures = list(donnees_mesures)
+        return cls(*(list(map(itemgetter(cle), donnees_mesures))
+                     for cle in ("temp", "humidite", "pression", "ville", "pluvieux")))
+
+    def __len__(self):
+        return len(self.temperatures)
+
+    def _temperatures_origine(self):
+        """Températures avec leur type d'origine (int ou float)"""
+        if not any(self.temperatures_entieres):
+            return self.temperatures.tolist()
+        return [int(temperature) if entiere else temperature
+                for temperature, entiere in zip(self.temperatures, self.temperatures_entieres)]
+
+    def mesure(self, index):
+        """Mesure d'indice `index`, sous forme d'objet Mesure"""
+        temperature = self.temperatures[index]
+        return Mesure(int(temperature) if self.temperatures_entieres[index] else temperature,
+                      self.humidites[index], self.pressions[index],
+                      self.villes[self.codes_villes[index]], bool(self.pluvieux[index]))
+
+    def __iter__(self):
+        return map(self.mesure, range(len(self)))
+
+    def analyser_humidite(self):
+        """Colonnes (niveaux, descriptions, ecarts_info) de Mesure.analyser_humidite(), calculées une fois par humidité distincte"""
+        par_humidite = {humidite: Mesure.analyser_humidite(SimpleNamespace(humidite=humidite))
+                        for humidite in set(self.humidites)}
+        niveaux, descriptions, ecarts = (
+            {humidite: resultat[position] for humidite, resultat in par_humidite.items()} for position in range(3))
+        return (array("B", map(niveaux.__getitem__, self.humidites)),      # array("B")
+                list(map(descriptions.__getitem__, self.humidites)),       # list[str]
+                list(map(ecarts.__getitem__, self.humidites)))             # list[str]
+
+    def analyser_temperature(self):
+        """Colonnes de Mesure.analyser_temperature() : celsius, fahrenheit, kelvin, arrondie"""
+        temperatures = self.temperatures
+        celsius = self._temperatures_origine()
+        return {
+            "celsius": celsius,                                                              # list
+            "fahrenheit": array("d", [temperature * 1.8 + 32.0 for temperature in temperatures]),
+            "kelvin": array("d", [temperature + 273.15 for temperature in temperatures]),
+            "arrondie": [round(temperature, 1) for temperature in celsius],                  # list
+        }
+
+    def analyser_ville(self):
+        """Colonnes de Mesure.analyser_ville(), calculées une fois par ville distincte"""
+        par_ville = [Mesure.analyser_ville(SimpleNamespace(ville=ville)) for ville in self.villes]
+        return {cle: list(map([resultat[cle] for resultat in par_ville].__getitem__, self.codes_villes))
+                for cle in (par_ville[0] if par_ville else ())}
+
+    def analyser_conditions_meteo(self):
+        """Colonnes de booléens de Mesure.analyser_conditions_meteo() : pluie, froid, chaud, agreable"""
+        pluie = [bool(pluvieux) for pluvieux in self.pluvieux]
+        froid = [temperature < 5.0 for temperature in self.temperatures]
+        chaud = [temperature > 30.0 for temperature in self.temperatures]
+        return {
+            "pluie": pluie,
+            "froid": froid,
+            "chaud": chaud,
+            "agreable": [not il_pleut and not (basse or haute) for il_pleut, basse, haute in zip(pluie, froid, chaud)],
+        }
+
+    def classifier_conditions_avancees(self):
+        """Colonnes de Mesure.classifier_conditions_avancees() ; score_confort est un array("B")"""
+        temperatures, humidites, pressions = self.temperatures, self.humidites, self.pressions
+        return {
+            "temperature_froide": [0 <= temp < 10 for temp in temperatures],
+            "temperature_temperee": [10 <= temp <= 25 for temp in temperatures],
+            "temperature_chaude": [temp > 25 for temp in temperatures],
+            "confort_optimal": [15 <= temp <= 25 and 40 <= humidite <= 70
+                                for temp, humidite in zip(temperatures, humidites)],
+            "risque_orage": [pression < 1000 and humidite > 85 for pression, humidite in zip(pressions, humidites)],
+            "score_confort": array("B", [(18 <= temp <= 22) + (45 <= humidite <= 65) + (1013 <= pression <= 1020)
+                                         for temp, humidite, pression in zip(temperatures, humidites, pressions)]),
+        }
+
+    def analyser_conditions_logiques(self):
+        """Colonnes de Mesure.analyser_conditions_logiques() (lois de De Morgan vérifiées par mesure)"""
+        temperatures, humidites = self.temperatures, self.humidites
+        pluvieux = [bool(pluie) for pluie in self.pluvieux]
+        normales = [(15 <= temp <= 25, 40 <= humidite <= 70) for temp, humidite in zip(temperatures, humidites)]
+        return {
+            "equivalence_loi1": [(not (temp_normale and humidite_normale)) == ((not temp_normale) or (not humidite_normale))
+                                 for temp_normale, humidite_normale in normales],
+            "equivalence_loi2": [(not (temp > 35 or humidite > 90)) == ((temp <= 35) and (humidite <= 90))
+                                 for temp, humidite in zip(temperatures, humidites)],
+            "simplification_reussie": [
+                (not (not pluie and not (temp > 30 or humidite < 20))) == (pluie or temp > 30 or humidite < 20)
+                for temp, humidite, pluie in zip(temperatures, humidites, pluvieux)],
+        }
+
+    def valider(self, noms=None, arret_au_premier=False, limite=None):
+        """Rapport de REGLES_METEO.valider_lot() sur les colonnes du lot (voir RegistreRegles.valider())"""
+        return REGLES_METEO.valider_lot(self, noms, arret_au_premier, limite)
@@ -3,7 +3,667 @@ TextAnalyzer - Analyseur de texte
 Leçon 3: Opérateurs et expressions
 """
 
-import re
+import codecs
+import math
+import mmap
+import os
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import islice
+from operator import itemgetter
+
+from esquisses import HyperLogLog, MotsFrequents
+from index_mots import IndexMots
+from instrumentation import instrumenter
+from motifs import MOTIFS_TEXTE
+from resultats import compacter
+from sorties import abreger, ecrire_stats_csv, ecrire_stats_json
+
+
+TAILLE_BLOC = 1 << 16  # caractères lus à la fois en mode flux
+TAILLE_BLOC_OCTETS = 1 << 20  # octets lus à la fois depuis un fichier projeté en mémoire
+TAILLE_LOT = 2000  # textes envoyés ensemble à un processus par analyser_lot()
+VOYELLES = "aeiouy"
+# Seuls ces caractères vérifient `char.lower() in VOYELLES` dans tout Unicode
+INITIALES_VOYELLES = frozenset(VOYELLES + VOYELLES.upper())
+# Caractères reconnus comme fin de ligne par str.splitlines()
+SAUTS_DE_LIGNE = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+# Classes de caractères ASCII selon str.isalpha(), str.isdigit() et str.isspace()
+LETTRES_ASCII = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CHIFFRES_ASCII = b"0123456789"
+ESPACES_ASCII = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+TOUS_ASCII = bytes(range(128))
+# Bits de classe d'un caractère, indépendants comme les trois tests de verifier_conditions_texte()
+LETTRE, CHIFFRE, ESPACE = 1, 2, 4
+# Table de correspondance caractère -> bits de classe, complétée au fil des caractères rencontrés
+CLASSES_CARACTERES = {chr(code): (chr(code).isalpha() * LETTRE | chr(code).isdigit() * CHIFFRE
+                                  | chr(code).isspace() * ESPACE) for code in range(128)}
+
+
+def classe_caractere(char):
+    if char not in CLASSES_CARACTERES:
+        CLASSES_CARACTERES[char] = char.isalpha() * LETTRE | char.isdigit() * CHIFFRE | char.isspace() * ESPACE
+    return CLASSES_CARACTERES[char]
+
+
+def compter_octets(octets):
+    """Compte lettres, chiffres et espaces d'un texte ASCII en supprimant chaque classe en C"""
+    taille = len(octets)
+    return (
+        taille - len(octets.translate(None, LETTRES_ASCII)),   # int: lettres
+        taille - len(octets.translate(None, CHIFFRES_ASCII)),  # int: chiffres
+        taille - len(octets.translate(None, ESPACES_ASCII)),   # int: espaces
+    )
+
+
+# Au-delà de ce nombre de caractères distincts, compter_par_caractere() passe à Counter
+MAX_DISTINCTS_COUNT = 16
+
+
+def compter_par_caractere(texte):
+    """
+    Compte chaque caractère distinct en O(len(texte)) : str.count() (un parcours en C par
+    caractère) pour quelques caractères distincts, Counter en un seul parcours sinon.
+    """
+    distincts = set(texte)
+    if len(distincts) <= MAX_DISTINCTS_COUNT:
+        return {char: texte.count(char) for char in distincts}  # dict[str, int]
+    return Counter(texte)  # Counter[str]
+
+
+def compter_classes(texte):
+    """Compte lettres, chiffres et espaces comme analyser_caracteres(), sans boucle Python par caractère"""
+    if texte.isascii():
+        return compter_octets(texte.encode("ascii"))
+    # Les octets UTF-8 des caractères non ASCII sont tous >= 0x80 : compter_octets() ne compte
+    # que les caractères ASCII, puis les caractères non ASCII, isolés en C, sont classés à part
+    octets = texte.encode("utf-8", "surrogatepass")
+    lettres, chiffres, espaces = compter_octets(octets)
+    non_ascii = octets.translate(None, TOUS_ASCII).decode("utf-8", "surrogatepass")
+    for char, nombre in compter_par_caractere(non_ascii).items():
+        classe = classe_caractere(char)
+        if classe & LETTRE:
+            lettres += nombre
+        elif classe & CHIFFRE:
+            chiffres += nombre
+        elif classe & ESPACE:
+            espaces += nombre
+    return lettres, chiffres, espaces
+
+
+def verifier_classes(texte, taille_bloc=TAILLE_BLOC):
+    """
+    Retourne (contient_lettres, contient_chiffres, contient_espaces, tous_alphabetiques)
+    comme les any()/all() caractère par caractère, en un seul parcours par blocs.
+
+    Seuls les caractères distincts de chaque bloc sont classés, via la table
+    CLASSES_CARACTERES ; le parcours s'arrête dès que les quatre réponses sont connues.
+    """
+    classes = 0
+    tous_alphabetiques = bool(texte)
+    for debut in range(0, len(texte), taille_bloc):
+        bloc = texte[debut:debut + taille_bloc]
+        if tous_alphabetiques and bloc.isalpha():
+            classes |= LETTRE
+            continue
+        tous_alphabetiques = False
+        for char in set(bloc):
+            classes |= classe_caractere(char)
+        if classes == LETTRE | CHIFFRE | ESPACE:
+            break
+    return bool(classes & LETTRE), bool(classes & CHIFFRE), bool(classes & ESPACE), tous_alphabetiques
+
+
+def blocs_de_lignes(texte, taille_bloc=TAILLE_BLOC):
+    """
+    Produit (position, bloc) : `texte` découpé en blocs de lignes complètes d'environ
+    `taille_bloc` caractères, coupés après un "\n" ou un "\r" (jamais entre "\r" et "\n").
+    Les splitlines() des blocs mis bout à bout donnent texte.splitlines().
+    """
+    debut = 0
+    while debut < len(texte):
+        fin = debut + taille_bloc
+        if fin < len(texte):
+            coupure = max(texte.rfind("\n", debut, fin), texte.rfind("\r", debut, fin))
+            if coupure < debut:
+                # Ligne plus longue que le bloc : on va jusqu'à sa fin
+                suivantes = [position for position in (texte.find("\n", fin), texte.find("\r", fin)) if position >= 0]
+                coupure = min(suivantes) if suivantes else len(texte)
+            fin = coupure + 1
+            if texte[coupure:coupure + 2] == "\r\n":
+                fin += 1
+        yield debut, texte[debut:fin]
+        debut = fin
+
+
+# Représentations de mots_par_ligne : liste d'int, array("I") compact ou résumé (histogramme)
+FORMATS_LIGNES = ("liste", "compact", "resume")
+
+
+def serie_vide(format_lignes):
+    """Conteneur de mots_par_ligne pour `format_lignes` (un Counter nombre de mots -> lignes pour le résumé)"""
+    if format_lignes not in FORMATS_LIGNES:
+        raise ValueError(f"Format de lignes inconnu : {format_lignes!r} (attendu : {', '.join(FORMATS_LIGNES)})")
+    if format_lignes == "compact":
+        return array("I")
+    if format_lignes == "resume":
+        return Counter()
+    return []
+
+
+def etendre_serie(serie, valeurs):
+    if isinstance(serie, Counter):
+        serie.update(valeurs)
+    else:
+        serie.extend(valeurs)
+
+
+def resumer_serie(histogramme):
+    """
+    Résumé d'un histogramme nombre de mots -> nombre de lignes : minimum, maximum,
+    moyenne et percentiles (rang le plus proche), sans liste ligne par ligne.
+    """
+    total = sum(histogramme.values())
+    if not total:
+        return {"histogramme": dict()}
+    valeurs = sorted(histogramme)
+    resume = {
+        "histogramme": {valeur: histogramme[valeur] for valeur in valeurs}, # dict[int, int]
+        "minimum": valeurs[0], # int
+        "maximum": valeurs[-1], # int
+        "moyenne": sum(valeur * nombre for valeur, nombre in histogramme.items()) / total, # float
+    }
+    for percentile in (50, 90, 99):
+        rang = math.ceil(percentile / 100 * total)
+        cumul = 0
+        for valeur in valeurs:
+            cumul += histogramme[valeur]
+            if cumul >= rang:
+                resume[f"p{percentile}"] = valeur # int
+                break
+    return resume
+
+
+def lire_blocs(source, taille_bloc=TAILLE_BLOC, encoding="utf-8"):
+    """
+    Produit le texte d'une source morceau par morceau, sans jamais la charger entière.
+
+    Args:
+        source: chemin de fichier, objet fichier (texte ou binaire) ou itérable de morceaux str/bytes
+        taille_bloc (int): nombre de caractères (ou d'octets) lus à chaque appel de read()
+        encoding (str): encodage des fichiers et des morceaux binaires
+
+    Les fichiers sont ouverts avec newline="" : les fins de ligne sont conservées telles quelles.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding, newline="") as fichier:
+            yield from lire_blocs(fichier, taille_bloc, encoding)
+        return
+
+    blocs = source
+    if hasattr(source, "read"):
+        blocs = iter(lambda: source.read(taille_bloc), source.read(0))
+
+    decodeur = codecs.getincrementaldecoder(encoding)()
+    for bloc in blocs:
+        # Un caractère multi-octets peut être coupé entre deux morceaux binaires
+        yield decodeur.decode(bloc) if isinstance(bloc, (bytes, bytearray)) else bloc
+    yield decodeur.decode(b"", final=True)
+
+
+def lire_lignes(source, taille_bloc=TAILLE_BLOC, encoding="utf-8"):
+    """
+    Produit les lignes d'une source (comme lire_blocs()), sans leur fin de ligne : les
+    mêmes que str.splitlines() sur le texte entier, avec une seule ligne en attente.
+    """
+    reste = ""
+    for bloc in lire_blocs(source, taille_bloc, encoding):
+        if not bloc:
+            continue
+        texte = reste + bloc
+        lignes = texte.splitlines()
+        # "\r" peut être suivi d'un "\n" dans le bloc suivant
+        if texte[-1] == "\r":
+            reste = lignes.pop() + "\r"
+        elif texte[-1] not in SAUTS_DE_LIGNE:
+            reste = lignes.pop()
+        else:
+            reste = ""
+        yield from lignes
+    if reste:
+        yield from reste.splitlines()
+
+
+def decouper_fichier(chemin, nombre_tranches):
+    """
+    Découpe un fichier en tranches d'octets (debut, fin) qui se terminent toutes sur un "\\n".
+
+    Couper juste après un "\\n" ne sépare jamais un "\\r\\n" ni un caractère UTF-8 multi-octets.
+    """
+    taille = os.path.getsize(chemin)
+    bornes = [0]
+    with open(chemin, "rb") as fichier:
+        for i in range(1, nombre_tranches):
+            position = max(taille * i // nombre_tranches, bornes[-1])
+            fichier.seek(position)
+            while True:
+                bloc = fichier.read(TAILLE_BLOC)
+                if not bloc:
+                    position = taille
+                    break
+                fin_ligne = bloc.find(b"\n")
+                if fin_ligne >= 0:
+                    position += fin_ligne + 1
+                    break
+                position += len(bloc)
+            if position >= taille:
+                break
+            if position > bornes[-1]:
+                bornes.append(position)
+    bornes.append(taille)
+    return list(zip(bornes, bornes[1:]))
+
+
+def blocs_mmap(chemin, debut=0, fin=None, taille_bloc=TAILLE_BLOC_OCTETS):
+    """
+    Produit les octets [debut, fin) d'un fichier projeté en mémoire, par blocs coupés après un "\\n".
+
+    Seul le bloc courant est copié hors de la projection ; une ligne plus longue
+    que `taille_bloc` forme un bloc à elle seule.
+    """
+    if not os.path.getsize(chemin):
+        return
+    with open(chemin, "rb") as fichier, \
+            mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ) as projection, \
+            memoryview(projection) as vue:
+        fin = len(projection) if fin is None else fin
+        position = debut
+        while position < fin:
+            fin_bloc = min(position + taille_bloc, fin)
+            if fin_bloc < fin:
+                coupure = projection.rfind(b"\n", position, fin_bloc)
+                if coupure < 0:
+                    coupure = projection.find(b"\n", fin_bloc, fin)
+                fin_bloc = coupure + 1 if coupure >= 0 else fin
+            yield vue[position:fin_bloc].tobytes()
+            position = fin_bloc
+
+
+def analyser_tranche(chemin, debut, fin, encoding="utf-8", options=None):
+    """Analyse les octets [debut, fin) d'un fichier et retourne ses StatistiquesPartielles(**options)"""
+    partiel = StatistiquesPartielles(**(options or dict()))
+    for bloc in blocs_mmap(chemin, debut, fin):
+        partiel.ajouter_octets(bloc, encoding)
+    return partiel
+
+
+class StatistiquesPartielles:
+    """
+    Accumulateur des statistiques de TextAnalyzer, alimenté morceau par morceau.
+
+    Les caractères sont comptés sur chaque morceau reçu ; les mots et les lignes
+    ne sont comptés qu'une fois la ligne terminée, la fin de ligne incomplète
+    étant conservée dans `reste` jusqu'au morceau suivant. vers_stats() tient
+    compte de cette ligne en attente sans la consommer.
+    """
+
+    def __init__(self, avec_mots=True, avec_regex=False, precision_uniques=None, k_frequents=None,
+                 format_lignes="liste", positions_lignes=False):
+        """
+        Args:
+            avec_mots (bool): False pour ne calculer que les catégories caracteres et lignes
+            avec_regex (bool): True pour calculer aussi la catégorie regex
+            precision_uniques (int): estime mots_uniques avec un HyperLogLog de cette précision
+                (mémoire fixe) au lieu de garder l'ensemble des mots
+            k_frequents (int): calcule aussi la catégorie mots_frequents (k mots les plus fréquents)
+            format_lignes (str): représentation de mots_par_ligne, voir TextAnalyzer.analyser_lignes()
+            positions_lignes (bool): donne ligne_la_plus_longue par ses positions (debut, fin) dans
+                le texte reçu, comme TextAnalyzer.analyser_lignes() hors du format "liste"
+        """
+        self.avec_mots = avec_mots          # bool
+        self.avec_regex = avec_regex        # bool
+        self.precision_uniques = precision_uniques  # int ou None
+        self.k_frequents = k_frequents      # int ou None
+        self.format_lignes = format_lignes  # str
+        self.positions_lignes = positions_lignes  # bool
+        self.nombre_caracteres = 0          # int
+        self.lettres = 0                    # int
+        self.chiffres = 0                   # int
+        self.espaces = 0                    # int
+        self.nombre_mots = 0                # int
+        self.mots_uniques = HyperLogLog(precision_uniques) if precision_uniques else set()  # set ou HyperLogLog
+        self.frequents = MotsFrequents(k_frequents) if k_frequents else None  # MotsFrequents
+        self.mot_le_plus_long = ""          # str
+        self.longueurs = Counter()          # Counter: longueur -> nombre de mots
+        self.commence_par_voyelle = 0       # int
+        self.fini_par_un_point = 0          # int
+        self.commence_par_majuscule = 0     # int
+        self.nombre_lignes = 0              # int
+        self.lignes_vides = 0               # int
+        self.ligne_la_plus_longue = ""      # str
+        self.position_plus_longue = (0, 0)  # tuple[int, int]: positions de ligne_la_plus_longue
+        self.mots_par_ligne = serie_vide(format_lignes)  # list, array ou Counter selon format_lignes
+        self.regex = dict() if avec_regex else None  # dict[str, list]: correspondances de MOTIFS_TEXTE
+        self.reste = ""                     # str: ligne pas encore terminée
+        self._publiees = dict()             # dict: clé -> (liste retournée par vers_stats, éléments terminés)
+
+    def ajouter(self, texte):
+        """Ajoute un morceau de texte ; la dernière ligne reste en attente si elle n'est pas terminée."""
+        if not texte:
+            return
+        self._compter_caracteres(texte)
+        self._ajouter_texte(texte)
+
+    def ajouter_octets(self, octets, encoding="utf-8"):
+        """
+        Ajoute un morceau binaire qui se termine sur un caractère complet (par exemple après un "\\n").
+
+        Un morceau purement ASCII est compté directement sur les octets, sans passer
+        par la classification Unicode ; les autres sont décodés avec `encoding`.
+        """
+        if not octets:
+            return
+        if not octets.isascii():
+            self.ajouter(octets.decode(encoding))
+            return
+        self.nombre_caracteres += len(octets)
+        self._compter_octets(octets)
+        self._ajouter_texte(octets.decode("ascii"))
+
+    def _ajouter_texte(self, texte):
+        texte = self.reste + texte
+        lignes = texte.splitlines()
+        # "\r" peut être suivi d'un "\n" dans le morceau suivant
+        if texte[-1] == "\r":
+            self.reste = lignes.pop() + "\r"
+        elif texte[-1] not in SAUTS_DE_LIGNE:
+            self.reste = lignes.pop()
+        else:
+            self.reste = ""
+        # `texte` est la fin des self.nombre_caracteres caractères reçus
+        self._ajouter_lignes(lignes, texte, self.nombre_caracteres - len(texte))
+
+    def terminer(self):
+        """Compte la dernière ligne en attente, à appeler à la fin du texte."""
+        if self.reste:
+            self._ajouter_lignes(self.reste.splitlines(), self.reste, self.nombre_caracteres - len(self.reste))
+            self.reste = ""
+
+    def fusionner(self, autre):
+        """
+        Ajoute les statistiques de `autre`, calculées sur le texte qui suit celui de `self`.
+
+        La fusion est associative : des morceaux consécutifs peuvent être analysés
+        séparément puis fusionnés dans l'ordre, à condition que `self` se termine
+        sur une fin de ligne (aucune ligne en attente).
+        """
+        if self.reste:
+            raise ValueError("Impossible de fusionner : la dernière ligne n'est pas terminée")
+        if self.options() != autre.options():
+            raise ValueError("Impossible de fusionner des statistiques calculées avec des options différentes")
+
+        decalage = self.nombre_caracteres
+        self.nombre_caracteres += autre.nombre_caracteres
+        self.lettres += autre.lettres
+        self.chiffres += autre.chiffres
+        self.espaces += autre.espaces
+        self.nombre_mots += autre.nombre_mots
+        if self.precision_uniques:
+            self.mots_uniques.fusionner(autre.mots_uniques)
+        else:
+            self.mots_uniques |= autre.mots_uniques
+        if self.frequents is not None:
+            self.frequents.fusionner(autre.frequents)
+        self.longueurs += autre.longueurs
+        self.commence_par_voyelle += autre.commence_par_voyelle
+        self.fini_par_un_point += autre.fini_par_un_point
+        self.commence_par_majuscule += autre.commence_par_majuscule
+        self.nombre_lignes += autre.nombre_lignes
+        self.lignes_vides += autre.lignes_vides
+        self.mots_par_ligne += autre.mots_par_ligne
+        if self.avec_regex:
+            for nom, correspondances in autre.regex.items():
+                self.regex.setdefault(nom, []).extend(correspondances)
+        self.mot_le_plus_long = premier_plus_long(self.mot_le_plus_long, autre.mot_le_plus_long)
+        if len(autre.ligne_la_plus_longue) > len(self.ligne_la_plus_longue):
+            self.ligne_la_plus_longue = autre.ligne_la_plus_longue
+            debut, fin = autre.position_plus_longue
+            self.position_plus_longue = (debut + decalage, fin + decalage)
+        self.reste = autre.reste
+        return self
+
+    def _compter_caracteres(self, texte):
+        self.nombre_caracteres += len(texte)
+        lettres, chiffres, espaces = compter_classes(texte)
+        self.lettres += lettres
+        self.chiffres += chiffres
+        self.espaces += espaces
+
+    def _compter_octets(self, octets):
+        lettres, chiffres, espaces = compter_octets(octets)
+        self.lettres += lettres
+        self.chiffres += chiffres
+        self.espaces += espaces
+
+    def _ajouter_lignes(self, lignes, texte, debut):
+        """Compte les lignes terminées `lignes`, découpées dans `texte` qui commence à la position `debut`"""
+        if not lignes:
+            return
+        mots = []
+        if self.avec_mots:
+            mots_par_ligne = []
+            for ligne in lignes:
+                mots_ligne = ligne.split()
+                mots_par_ligne.append(len(mots_ligne))
+                mots += mots_ligne
+        else:
+            # Seul le nombre de mots par ligne est utile : découpage entièrement en C
+            mots_par_ligne = list(map(len, map(str.split, lignes)))
+
+        self.nombre_lignes += len(lignes)
+        # Une ligne sans mot est une ligne qui ne contient que des espaces
+        self.lignes_vides += mots_par_ligne.count(0)
+        etendre_serie(self.mots_par_ligne, mots_par_ligne)
+        plus_longue = max(lignes, key=len)
+        if len(plus_longue) > len(self.ligne_la_plus_longue):
+            self.ligne_la_plus_longue = plus_longue
+            if self.positions_lignes:
+                # Aucune ligne qui précède n'est plus longue : la première occurrence est la bonne
+                position = debut + texte.find(plus_longue)
+                self.position_plus_longue = (position, position + len(plus_longue))
+        self._ajouter_mots(mots)
+
+        if self.avec_regex:
+            # Aucun motif de MOTIFS_TEXTE ne traverse une fin de ligne : les lignes suffisent
+            for nom, correspondances in MOTIFS_TEXTE.extraire("\n".join(lignes)).items():
+                self.regex.setdefault(nom, []).extend(correspondances)
+
+    def options(self):
+        """Paramètres du constructeur, identiques pour des statistiques fusionnables"""
+        return {
+            "avec_mots": self.avec_mots,
+            "avec_regex": self.avec_regex,
+            "precision_uniques": self.precision_uniques,
+            "k_frequents": self.k_frequents,
+            "format_lignes": self.format_lignes,
+            "positions_lignes": self.positions_lignes,
+        }
+
+    def _ajouter_mots(self, mots):
+        if not mots:
+            return
+        self.nombre_mots += len(mots)
+        minuscules = list(map(str.lower, mots))
+        self.mots_uniques.update(minuscules)
+        if self.frequents is not None:
+            self.frequents.update(minuscules)
+        self.longueurs.update(map(len, mots))
+        self.mot_le_plus_long = premier_plus_long(self.mot_le_plus_long, max(mots, key=len))
+
+        premieres_lettres = "".join(map(itemgetter(0), mots))
+        for lettre, nombre in compter_par_caractere(premieres_lettres).items():
+            if lettre.lower() in VOYELLES:
+                self.commence_par_voyelle += nombre
+            if lettre.isupper():
+                self.commence_par_majuscule += nombre
+        self.fini_par_un_point += "".join(map(itemgetter(-1), mots)).count(".")
+
+    def _publier(self, cle, terminees, en_attente):
+        """
+        Liste `terminees` + `en_attente`, obtenue en prolongeant sur place celle du précédent
+        appel : seuls les éléments ajoutés depuis sont copiés.
+        """
+        publiee, deja = self._publiees.get(cle, (terminees[:0], 0))
+        del publiee[deja:]
+        publiee.extend(terminees[deja:])
+        publiee.extend(en_attente)
+        self._publiees[cle] = (publiee, len(terminees))
+        return publiee
+
+    def vers_stats(self, categories=None):
+        """
+        Construit les catégories de `TextAnalyzer.stats` (toutes, ou seulement `categories`)
+        à partir des compteurs. Les listes retournées (mots_par_ligne, regex) sont des vues
+        vivantes : celles du précédent appel, prolongées sur place à chaque appel.
+        """
+        if not self.nombre_caracteres:
+            return dict()
+        voulues = set(METHODES_PAR_CATEGORIE if categories is None else categories)
+
+        # La ligne en attente est comptée à part, sans être consommée : elle peut encore être prolongée
+        fin = StatistiquesPartielles(**self.options())
+        fin._ajouter_lignes(self.reste.splitlines(), self.reste, self.nombre_caracteres - len(self.reste))
+
+        stats = dict()
+        if "caracteres" in voulues:
+            stats["caracteres"] = {
+                "nombre_caracteres": self.nombre_caracteres, # int
+                "lettres": self.lettres, # int
+                "chiffres": self.chiffres, # int
+                "espaces": self.espaces, # int
+                "text_vide": False # bool
+            }
+        lignes = None
+        if "lignes" in voulues:
+            nombre_lignes = self.nombre_lignes + fin.nombre_lignes
+            lignes_vides = self.lignes_vides + fin.lignes_vides
+            if self.format_lignes == "resume":
+                mots_par_ligne = resumer_serie(self.mots_par_ligne + fin.mots_par_ligne)
+            else:
+                mots_par_ligne = self._publier("mots_par_ligne", self.mots_par_ligne, fin.mots_par_ligne)
+            if self.positions_lignes:
+                ligne_la_plus_longue = fin.position_plus_longue \
+                    if len(fin.ligne_la_plus_longue) > len(self.ligne_la_plus_longue) else self.position_plus_longue
+            else:
+                ligne_la_plus_longue = premier_plus_long(self.ligne_la_plus_longue, fin.ligne_la_plus_longue)
+            lignes = {
+                "nombre_lignes": nombre_lignes, # int
+                "lignes_vides": lignes_vides, # int
+                "lignes_avec_texte": nombre_lignes - lignes_vides, # int
+                "ligne_la_plus_longue": ligne_la_plus_longue, # str, ou tuple (debut, fin) avec positions_lignes
+                "mots_par_ligne": mots_par_ligne, # list, array ou dict
+            }
+        if not self.avec_mots:
+            if lignes is not None:
+                stats["lignes"] = lignes
+            return stats
+
+        nombre_mots = self.nombre_mots + fin.nombre_mots
+        if voulues & {"mots", "conditions", "taille_mots"}:
+            longueurs = self.longueurs + fin.longueurs
+            somme_longueurs = sum(longueur * nombre for longueur, nombre in longueurs.items())
+            longueur_moyenne = somme_longueurs / nombre_mots if nombre_mots else 0
+            mot_le_plus_long = premier_plus_long(self.mot_le_plus_long, fin.mot_le_plus_long)
+            longueur_max = len(mot_le_plus_long)
+
+        if nombre_mots and "mots" in voulues:
+            if self.precision_uniques:
+                mots_uniques = self.mots_uniques.copie().fusionner(fin.mots_uniques).estimer()
+            else:
+                mots_uniques = len(self.mots_uniques) + len(fin.mots_uniques - self.mots_uniques)
+            stats["mots"] = {
+                "nombre_mots": nombre_mots, # int
+                "mots_uniques": mots_uniques, # int
+                "mot_le_plus_long": mot_le_plus_long, # str
+                "longueur_moyenne": longueur_moyenne, # float
+            }
+        if lignes is not None:
+            stats["lignes"] = lignes
+        if "patterns" in voulues:
+            stats["patterns"] = {
+                "commence_par_voyelle": self.commence_par_voyelle + fin.commence_par_voyelle, # int
+                "fini_par_un_point": self.fini_par_un_point + fin.fini_par_un_point, # int
+                "commence_par_majuscule": self.commence_par_majuscule + fin.commence_par_majuscule, # int
+            }
+        if self.avec_regex and "regex" in voulues:
+            stats["regex"] = {
+                nom: self._publier(("regex", nom), self.regex.get(nom, []), fin.regex.get(nom, []))
+                for nom in MOTIFS_TEXTE.noms()
+            }
+        if "conditions" in voulues:
+            stats["conditions"] = {
+                "contient_chiffres": self.chiffres > 0, # bool
+                "contient_lettres": self.lettres > 0, # bool
+                "contient_espaces": self.espaces > 0, # bool
+                "tous_mots_courts": longueur_max <= 3, # bool
+                "au_moins_un_mot_long": longueur_max > 3, # bool
+                "tous_alphabetiques": self.lettres == self.nombre_caracteres, # bool
+            }
+        if "taille_mots" in voulues:
+            stats["taille_mots"] = {
+                "longueur_moyenne": longueur_moyenne,
+                "mots_courts": sum(n for longueur, n in longueurs.items() if longueur < longueur_moyenne), # int
+                "mots_longs": sum(n for longueur, n in longueurs.items() if longueur > longueur_moyenne), # int
+                "mots_egaux": sum(n for longueur, n in longueurs.items() if longueur == longueur_moyenne), # int
+            }
+        if self.frequents is not None and "mots_frequents" in voulues:
+            stats["mots_frequents"] = dict(self.frequents.copie().fusionner(fin.frequents).plus_frequents()) # dict
+        return stats
+
+
+def premier_plus_long(premier, second):
+    """Comme max(..., key=len) : en cas d'égalité, garde le premier"""
+    return second if len(second) > len(premier) else premier
+
+
+# Méthode de TextAnalyzer qui calcule chaque catégorie de `stats`
+METHODES_PAR_CATEGORIE = {
+    "caracteres": "analyser_caracteres",
+    "mots": "analyser_mots",
+    "lignes": "analyser_lignes",
+    "patterns": "detecter_patterns",
+    "regex": "detecter_avec_regex",
+    "conditions": "verifier_conditions_texte",
+    "taille_mots": "analyser_taille_mots",
+    "mots_frequents": "mots_frequents",
+}
+
+
+def taille_analysee(analyseur, *args, **kwargs):
+    """Caractères couverts par les analyses de `analyseur` (éléments comptés par l'instrumentation)"""
+    if analyseur._partiel is not None:
+        return analyseur._partiel.nombre_caracteres
+    return len(analyseur.text)
+
+
+class StatsParesseuses(dict):
+    """
+    Dictionnaire `stats` d'un TextAnalyzer : une catégorie absente est calculée
+    au premier accès par sa méthode d'analyse, qui l'enregistre.
+
+    `in`, len() et l'itération ne voient que les catégories déjà calculées.
+    """
+
+    def __init__(self, analyseur):
+        super().__init__()
+        self.analyseur = analyseur  # TextAnalyzer
+
+    def __missing__(self, categorie):
+        if categorie not in METHODES_PAR_CATEGORIE:
+            raise KeyError(categorie)
+        return getattr(self.analyseur, METHODES_PAR_CATEGORIE[categorie])()
 
 
 class TextAnalyzer:
@@ -12,43 +672,248 @@ class TextAnalyzer:
         if not isinstance(text, str):
             raise TypeError("Le texte doit être une chaîne de caractères")
         
-        self.text = text
-        self.stats = dict()
+        self.text = text  # réinitialise aussi self.stats
+
+    @property
+    def text(self):
+        # Les fragments reçus par ajouter_texte() ne sont assemblés qu'à la lecture
+        if len(self._morceaux) > 1:
+            self._morceaux = ["".join(self._morceaux)]
+        return self._morceaux[0]
+
+    @text.setter
+    def text(self, text):
+        self._morceaux = [text]  # list[str]
+        self._partiel = None  # StatistiquesPartielles, tenues à jour par ajouter_texte() et les modes flux
+        self._texte_conserve = True  # bool: False pour les analyseurs en flux, qui ne gardent pas le texte
+        self._options_partiel = dict()  # dict: options des analyses déjà faites, reprises par ajouter_texte()
+        self._cache = dict()  # dict: produits intermédiaires (mots, lignes) partagés entre analyses
+        self.stats = StatsParesseuses(self)
+
+    def _mots(self):
+        if "mots" not in self._cache:
+            self._cache["mots"] = self.text.split()
+        return self._cache["mots"]
+
+    def _lignes(self):
+        if "lignes" not in self._cache:
+            self._cache["lignes"] = self.text.splitlines()
+        return self._cache["lignes"]
+
+    def index_mots(self):
+        """Index des mots du texte (voir index_mots.py), construit au premier filtre"""
+        if "index_mots" not in self._cache:
+            self._cache["index_mots"] = IndexMots(self._mots())
+        return self._cache["index_mots"]
+
+    def filtrer_mots(self, longueur_min=None, longueur_max=None, prefixe=None, majuscule=None):
+        """
+        Version non interactive de extraire_mots_input() : produit, dans l'ordre du texte,
+        les mots qui vérifient tous les critères donnés.
+
+        Exemple:
+            >>> analyseur = TextAnalyzer("Bonjour le Monde entier")
+            >>> " | ".join(analyseur.filtrer_mots(longueur_min=5, majuscule=True))
+            'Bonjour | Monde'
+        """
+        return self.index_mots().filtrer(longueur_min, longueur_max, prefixe, majuscule)
+
+    def obtenir(self, categorie, cle=None):
+        """
+        Retourne une catégorie de statistiques, ou une seule valeur, en ne calculant que le nécessaire.
+
+        Exemple:
+            >>> TextAnalyzer("Bonjour le monde").obtenir("mots", "nombre_mots")
+            3
+        """
+        stats = self.stats[categorie]
+        return stats if cle is None else stats[cle]
+
+    @classmethod
+    def _depuis_partiel(cls, partiel):
+        analyseur = cls("")
+        analyseur._partiel = partiel
+        analyseur._texte_conserve = False
+        return analyseur
+
+    @classmethod
+    @instrumenter(elements_resultat=taille_analysee)
+    def depuis_flux(cls, source, taille_bloc=TAILLE_BLOC, encoding="utf-8", **options):
+        """
+        Construit un analyseur à partir d'un fichier ou d'un itérable de morceaux, sans garder le texte.
+
+        Seuls un bloc et la ligne en cours sont conservés en mémoire ; les résultats
+        de analyser_caracteres, analyser_mots, analyser_lignes, detecter_patterns,
+        verifier_conditions_texte et analyser_taille_mots sont identiques à ceux
+        obtenus sur le texte complet. L'ensemble des mots uniques et la liste
+        mots_par_ligne grandissent toutefois avec le contenu, comme en mode normal ;
+        precision_uniques=... remplace l'ensemble par une estimation à mémoire fixe.
+        Les `options` sont celles de StatistiquesPartielles.
+
+        Exemple:
+            >>> import io
+            >>> analyseur = TextAnalyzer.depuis_flux(io.StringIO("Première ligne\\nDeuxième ligne\\n"))
+            >>> analyseur.analyser_lignes()["nombre_lignes"]
+            2
+        """
+        partiel = StatistiquesPartielles(**options)
+        for bloc in lire_blocs(source, taille_bloc, encoding):
+            partiel.ajouter(bloc)
+        return cls._depuis_partiel(partiel)
+
+    @classmethod
+    @instrumenter(elements_resultat=taille_analysee)
+    def depuis_fichier_mmap(cls, chemin, encoding="utf-8", **options):
+        """
+        Analyse un fichier projeté en mémoire (mmap), sans le décoder en une seule chaîne.
+
+        Les blocs ASCII sont comptés au niveau des octets ; les blocs contenant des
+        séquences non ASCII sont décodés avec `encoding` (compatible ASCII) et
+        analysés normalement. Le résultat est identique à celui de depuis_flux().
+
+        Avec avec_mots=False, seules analyser_caracteres et analyser_lignes sont
+        disponibles, ce qui évite de construire les mots un par un. Les autres
+        `options` sont celles de StatistiquesPartielles.
+        """
+        partiel = analyser_tranche(chemin, 0, os.path.getsize(chemin), encoding, options)
+        return cls._depuis_partiel(partiel)
+
+    @classmethod
+    @instrumenter(elements_resultat=taille_analysee)
+    def depuis_fichier_parallele(cls, chemin, processus=None, encoding="utf-8", **options):
+        """
+        Analyse un fichier en parallèle : une tranche de lignes par processus, puis fusion des résultats.
+
+        Args:
+            chemin (str): chemin du fichier à analyser
+            processus (int): nombre de processus (par défaut, le nombre de cœurs)
+            encoding (str): encodage compatible ASCII (UTF-8, Latin-1...)
+            options: options de StatistiquesPartielles ; avec precision_uniques, chaque
+                processus ne renvoie qu'une esquisse de taille fixe au lieu de ses mots
+
+        Le résultat est identique à celui de depuis_flux() sur le même fichier.
+        """
+        processus = processus or os.cpu_count() or 1
+        tranches = decouper_fichier(chemin, processus)
+
+        if len(tranches) == 1:
+            partiels = [analyser_tranche(chemin, *tranches[0], encoding, options)]
+        else:
+            with ProcessPoolExecutor(max_workers=processus) as executeur:
+                partiels = list(executeur.map(
+                    analyser_tranche,
+                    [chemin] * len(tranches),
+                    [debut for debut, _ in tranches],
+                    [fin for _, fin in tranches],
+                    [encoding] * len(tranches),
+                    [options] * len(tranches),
+                ))
+
+        return cls._depuis_partiel(reduce(StatistiquesPartielles.fusionner, partiels))
+
+    @instrumenter(elements=lambda analyseur, fragment: len(fragment))
+    def ajouter_texte(self, fragment):
+        """
+        Ajoute un fragment à la fin du texte et met à jour les statistiques déjà calculées.
+
+        Le texte existant n'est analysé qu'au premier appel ; ensuite seuls le fragment
+        et la dernière ligne, qu'il peut prolonger, sont parcourus. Les catégories
+        absentes de self.stats restent disponibles à la demande, sans nouveau parcours.
+        Les options déjà choisies (precision_uniques, format_lignes) sont conservées.
+        Les listes mots_par_ligne et regex de self.stats sont prolongées sur place : un
+        résultat déjà obtenu suit donc les ajouts suivants (le copier pour le figer).
+
+        Exemple:
+            >>> analyseur = TextAnalyzer("Bonjour le mon")
+            >>> analyseur.analyser_mots()["mot_le_plus_long"]
+            'Bonjour'
+            >>> analyseur.ajouter_texte("dialement connu")
+            >>> analyseur.stats["mots"]["mot_le_plus_long"]
+            'mondialement'
+        """
+        if not isinstance(fragment, str):
+            raise TypeError("Le fragment doit être une chaîne de caractères")
+
+        if self._partiel is None:
+            format_lignes = self._options_partiel.get("format_lignes", "liste")
+            self._partiel = StatistiquesPartielles(avec_regex=True, positions_lignes=format_lignes != "liste",
+                                                   **self._options_partiel)
+            self._partiel.ajouter(self.text)
+        self._partiel.ajouter(fragment)
+        if self._texte_conserve:
+            self._morceaux.append(fragment)
+        self._cache.clear()
+
+        stats = self._partiel.vers_stats(list(self.stats))
+        for categorie in list(self.stats):
+            if categorie in stats:
+                self.stats[categorie] = stats[categorie]
+            elif categorie == "mots_frequents":
+                # Recalculée à la demande sur le texte complet (partiel sans k_frequents)
+                del self.stats[categorie]
+
+    def _verifier_option(self, nom, valeur):
+        """Refuse une option d'analyse différente de celle des statistiques déjà accumulées"""
+        if valeur is not None and valeur != getattr(self._partiel, nom):
+            raise ValueError(f"{nom}={valeur!r} diffère de l'option des statistiques accumulées "
+                             f"({getattr(self._partiel, nom)!r}) : créer un nouvel analyseur")
+
+    def _stats_partielles(self, categorie):
+        if not self._partiel.avec_mots and categorie not in ("caracteres", "lignes"):
+            raise ValueError(f"L'analyse '{categorie}' n'est pas disponible sans les mots (avec_mots=False)")
+        stats = self._partiel.vers_stats([categorie])
+        if categorie not in stats:
+            return dict()
+        self.stats[categorie] = stats[categorie]
+        return stats[categorie]
     
+    @instrumenter(elements=taille_analysee)
     def analyser_caracteres(self):
+        if self._partiel is not None:
+            return self._stats_partielles("caracteres")
         if not self.text:
             return dict()
         
+        lettres, chiffres, espaces = compter_classes(self.text)
         stats = {
             "nombre_caracteres": len(self.text), # int
-            "lettres": 0, # int
-            "chiffres": 0, # int
-            "espaces": 0, # int
+            "lettres": lettres, # int
+            "chiffres": chiffres, # int
+            "espaces": espaces, # int
             "text_vide": not self.text # bool
         }
-        
-        for char in self.text:
-            if char.isalpha():
-                stats["lettres"] += 1
-            elif char.isdigit():
-                stats["chiffres"] += 1
-            elif char.isspace():
-                stats["espaces"] += 1
 
         self.stats["caracteres"] = stats
         
         return stats
     
-    def analyser_mots(self):
+    @instrumenter(elements=taille_analysee)
+    def analyser_mots(self, precision_uniques=None):
+        """
+        Avec precision_uniques, mots_uniques est estimé par un HyperLogLog (voir esquisses.py)
+        au lieu d'un ensemble de tous les mots. Pour une analyse en flux, l'option se passe
+        au constructeur (depuis_flux(..., precision_uniques=12)) ; après ajouter_texte(),
+        c'est celle de la première analyse. Une autre valeur lève alors ValueError.
+        """
+        if self._partiel is not None:
+            self._verifier_option("precision_uniques", precision_uniques)
+            return self._stats_partielles("mots")
         if not self.text:
             return dict()
+        self._options_partiel["precision_uniques"] = precision_uniques
         
-        mots = self.text.split() # list
+        mots = self._mots() # list
         
         if mots:
+            if precision_uniques:
+                uniques = HyperLogLog(precision_uniques)
+                uniques.update(map(str.lower, mots))
+                mots_uniques = uniques.estimer()
+            else:
+                mots_uniques = len(set(mot.lower() for mot in mots))
             stats = {
                 "nombre_mots": len(mots), # int
-                "mots_uniques": len(set(mot.lower() for mot in mots)), # int
+                "mots_uniques": mots_uniques, # int
                 "mot_le_plus_long": max(mots, key=len), # str
                 "longueur_moyenne": sum(len(mot) for mot in mots) / len(mots), # float
             }
@@ -59,29 +924,81 @@ class TextAnalyzer:
         else:
             return dict()
     
-    def analyser_lignes(self):
+    @instrumenter(elements=taille_analysee)
+    def analyser_lignes(self, format_lignes=None):
+        """
+        format_lignes choisit la représentation des lignes :
+            "liste" : mots_par_ligne est une liste d'int, ligne_la_plus_longue une str
+            "compact" : mots_par_ligne est un array("I") (4 octets par ligne au lieu d'environ 36)
+                et ligne_la_plus_longue le couple (debut, fin) de ses positions dans self.text
+            "resume" : comme "compact", mais mots_par_ligne est un résumé (histogramme,
+                minimum, maximum, moyenne, p50, p90, p99) et aucune série n'est conservée
+        Hors "liste", le texte est parcouru par blocs : la liste des lignes n'est jamais construite.
+        Par défaut "liste". Pour une analyse en flux, l'option se passe au constructeur
+        (format_lignes="resume") ; après ajouter_texte(), c'est celle de la première analyse.
+        Un autre format lève alors ValueError.
+        """
+        if self._partiel is not None:
+            self._verifier_option("format_lignes", format_lignes)
+            return self._stats_partielles("lignes")
         if not self.text:
             return dict()
+        format_lignes = format_lignes or "liste"
+        self._options_partiel["format_lignes"] = format_lignes
+        if format_lignes != "liste":
+            return self._analyser_lignes_par_blocs(format_lignes)
         
-        lignes = self.text.splitlines()
+        lignes = self._lignes()
         if lignes:
+            # Une ligne sans mot est une ligne vide ou blanche : split() et strip() ont les mêmes espaces
+            mots_par_ligne = [len(ligne.split()) for ligne in lignes]
+            lignes_vides = mots_par_ligne.count(0)
             stats = {
                 "nombre_lignes": len(lignes), # int
-                "lignes_vides": sum(1 for ligne in lignes if not ligne.strip()), # int
-                "lignes_avec_texte": sum(1 for ligne in lignes if ligne.strip()), # int
+                "lignes_vides": lignes_vides, # int
+                "lignes_avec_texte": len(lignes) - lignes_vides, # int
                 "ligne_la_plus_longue": max(lignes, key=len), # str
-                "mots_par_ligne": [len(ligne.split()) for ligne in lignes], # list
+                "mots_par_ligne": mots_par_ligne, # list
             }
             self.stats["lignes"] = stats
             return stats
         else:
             return dict()
+
+    def _analyser_lignes_par_blocs(self, format_lignes):
+        mots_par_ligne = serie_vide(format_lignes)
+        nombre_lignes = lignes_vides = 0
+        debut_plus_longue = fin_plus_longue = 0
+        for position, bloc in blocs_de_lignes(self.text):
+            lignes = bloc.splitlines()
+            mots_bloc = list(map(len, map(str.split, lignes)))
+            etendre_serie(mots_par_ligne, mots_bloc)
+            nombre_lignes += len(lignes)
+            lignes_vides += mots_bloc.count(0)
+            ligne = max(lignes, key=len)
+            if len(ligne) > fin_plus_longue - debut_plus_longue:
+                # Aucune ligne plus longue ne peut la contenir : find() trouve bien sa première occurrence
+                debut_plus_longue = position + bloc.find(ligne)
+                fin_plus_longue = debut_plus_longue + len(ligne)
+
+        stats = {
+            "nombre_lignes": nombre_lignes, # int
+            "lignes_vides": lignes_vides, # int
+            "lignes_avec_texte": nombre_lignes - lignes_vides, # int
+            "ligne_la_plus_longue": (debut_plus_longue, fin_plus_longue), # tuple(int, int)
+            "mots_par_ligne": resumer_serie(mots_par_ligne) if format_lignes == "resume" else mots_par_ligne, # array ou dict
+        }
+        self.stats["lignes"] = stats
+        return stats
     
+    @instrumenter(elements=taille_analysee)
     def detecter_patterns(self):
+        if self._partiel is not None:
+            return self._stats_partielles("patterns")
         if not self.text:
             return dict()
         
-        mots = self.text.split()
+        mots = self._mots()
         
         stats = {
             "commence_par_voyelle": sum(1 for mot in mots if mot[0].lower() in "aeiouy"), # int
@@ -96,7 +1013,6 @@ class TextAnalyzer:
         if not self.text:
             return ""
         
-        mots = self.text.split()
         print("""
               Voulez-vous filtrer les mots ?
               1. Par longueur (Supérieur ou égal à)
@@ -107,54 +1023,66 @@ class TextAnalyzer:
         if choix == "1":
             try:
                 longueur = int(input("Entrez la longueur minimale : "))
-                mots_filtres = [mot for mot in mots if len(mot) >= longueur]
+                mots_filtres = self.filtrer_mots(longueur_min=longueur)
             except ValueError:
                 print("Veuillez entrer un nombre valide.")
                 return ""
         elif choix == "2":
             lettre = input("Entrez la première lettre : ")
-            mots_filtres = [mot for mot in mots if mot.startswith(lettre)]
+            mots_filtres = self.filtrer_mots(prefixe=lettre)
         elif choix == "3":
-            mots_filtres = [mot for mot in mots if mot[0].isupper()]
+            mots_filtres = self.filtrer_mots(majuscule=True)
         else:
             print("Choix invalide.")
             return ""
         return " | ".join(mots_filtres)
     
+    @instrumenter(elements=taille_analysee)
     def detecter_avec_regex(self):
+        if self._partiel is not None and (self._partiel.avec_regex or not self._texte_conserve):
+            if not self._partiel.avec_regex:
+                raise ValueError("L'analyse 'regex' nécessite l'option avec_regex")
+            return self._stats_partielles("regex")
         if not self.text:
             return dict()
         
-        patterns = {
-            "emails": re.findall(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b", self.text), # list
-            "nombres": re.findall(r"\b\d+\b", self.text), # list
-        }
+        # emails, nombres et motifs enregistrés en plus, compilés une seule fois (voir motifs.py)
+        patterns = MOTIFS_TEXTE.extraire(self.text) # dict[str, list]
         
         self.stats["regex"] = patterns
         return patterns
     
+    @instrumenter(elements=taille_analysee)
     def verifier_conditions_texte(self):
+        if self._partiel is not None:
+            return self._stats_partielles("conditions")
         if not self.text:
             return dict()
         
-        mots = self.text.split()
+        mots = self._mots()
+        # Une seule classification du texte pour les quatre conditions sur les caractères
+        lettres, chiffres, espaces, tous_alphabetiques = verifier_classes(self.text)
+        au_moins_un_mot_long = any(len(mot) > 3 for mot in mots)
         
         conditions = {
-            "contient_chiffres": any(char.isdigit() for char in self.text), # bool
-            "contient_lettres": any(char.isalpha() for char in self.text), # bool
-            "contient_espaces": any(char.isspace() for char in self.text), # bool
-            "tous_mots_courts": all(len(mot) <= 3 for mot in mots), # bool
-            "au_moins_un_mot_long": any(len(mot) > 3 for mot in mots), # bool
-            "tous_alphabetiques": all(char.isalpha() for char in self.text), # bool
+            "contient_chiffres": chiffres, # bool
+            "contient_lettres": lettres, # bool
+            "contient_espaces": espaces, # bool
+            "tous_mots_courts": not au_moins_un_mot_long, # bool
+            "au_moins_un_mot_long": au_moins_un_mot_long, # bool
+            "tous_alphabetiques": tous_alphabetiques, # bool
         }
         self.stats["conditions"] = conditions
         return conditions
     
+    @instrumenter(elements=taille_analysee)
     def analyser_taille_mots(self):
+        if self._partiel is not None:
+            return self._stats_partielles("taille_mots")
         if not self.text:
             return dict()
         
-        mots = self.text.split()
+        mots = self._mots()
         longueur_moyenne = sum(len(mot) for mot in mots) / len(mots) if mots else 0
         analyse = {
             "longueur_moyenne": longueur_moyenne,
@@ -166,43 +1094,206 @@ class TextAnalyzer:
         self.stats["taille_mots"] = analyse
         return analyse
 
-    def afficher_stats(self):
-        print(f"Texte analysé : {self.text}")
+    @instrumenter(elements=taille_analysee)
+    def mots_frequents(self, k=10):
+        """
+        Retourne {mot: compte estimé} pour les k mots (en minuscules) les plus fréquents,
+        calculés par un Count-Min Sketch de taille fixe (voir esquisses.MotsFrequents).
+        Pour une analyse en flux, l'option se passe au constructeur (k_frequents=10).
+        """
+        if self._partiel is not None and (self._partiel.k_frequents or not self._texte_conserve):
+            if not self._partiel.k_frequents:
+                raise ValueError("L'analyse 'mots_frequents' nécessite l'option k_frequents")
+            return self._stats_partielles("mots_frequents")
+
+        frequents = MotsFrequents(k)
+        frequents.update(map(str.lower, self._mots()))
+        self.stats["mots_frequents"] = dict(frequents.plus_frequents())
+        return self.stats["mots_frequents"]
+
+    @instrumenter(elements=taille_analysee)
+    def analyser_tout(self):
+        # Toutes les analyses ci-dessus (sauf regex) en un seul parcours du texte
+        if self._partiel is not None:
+            stats = self._partiel.vers_stats()
+        elif not self.text:
+            return dict()
+        else:
+            partiel = StatistiquesPartielles()
+            partiel.ajouter(self.text)
+            partiel.terminer()
+            stats = partiel.vers_stats()
+
+        self.stats.update(stats)
+        return stats
+
+    def resultats(self):
+        """
+        Statistiques calculées sous forme compacte (resultats.ResultatsTexte), pour les
+        garder en mémoire ou les enregistrer en masse avec resultats.ecrire_resultats()
+        """
+        return compacter(self.stats)
+
+    def afficher_stats(self, sortie=None, limite=None):
+        """
+        Écrit le texte et les statistiques calculées dans `sortie` (sys.stdout par défaut),
+        ligne par ligne. Avec `limite`, le texte et les chaînes gardent au plus `limite`
+        caractères et les listes au plus `limite` éléments.
+        """
+        print(f"Texte analysé : {abreger(self.text, limite)}", file=sortie)
         for category, stats in self.stats.items():
-            print(f"\nStatistiques pour {category} :")
+            print(f"\nStatistiques pour {category} :", file=sortie)
             for key, value in stats.items():
-                print(f"{key}: {value}")
-    
+                print(f"{key}: {abreger(value, limite)}", file=sortie)
+
+    def exporter_stats(self, sortie, format="json", limite=None):
+        """
+        Écrit les statistiques calculées en JSON (un objet, les conteneurs tronqués notés
+        sous "_tronques") ou en CSV (categorie, cle, index, valeur), par petits morceaux.
+        Les listes gardent au plus `limite` éléments.
+        """
+        if format == "json":
+            ecrire_stats_json(self.stats, sortie, limite)
+        elif format == "csv":
+            ecrire_stats_csv(self.stats, sortie, limite)
+        else:
+            raise ValueError(f"Format d'export inconnu : {format!r} (attendu : json ou csv)")
+
+    @instrumenter(elements=taille_analysee)
     def generer_rapport(self):
-        if not self.stats:
-            return "Aucun rapport généré, veuillez d'abord analyser un texte."
+        return "\n".join(self._lignes_rapport())
+
+    def ecrire_rapport(self, sortie):
+        """Écrit le rapport de generer_rapport() dans `sortie`, ligne par ligne"""
+        for ligne in self._lignes_rapport():
+            sortie.write(ligne + "\n")
+
+    def _lignes_rapport(self):
+        # Les caractères sont calculés à la demande ; les autres sections n'apparaissent que si elles ont été analysées
+        if not self.stats["caracteres"]:
+            yield "Aucun rapport généré, veuillez d'abord analyser un texte."
+            return
         
         template = "{titre}: {valeur}"
         
-        rapport = list()
-        rapport.append("=" * 20)
-        rapport.append("Rapport d'analyse")
-        rapport.append("=" * 20)
+        yield "=" * 20
+        yield "Rapport d'analyse"
+        yield "=" * 20
         
-        rapport.append(f"Texte : {self.text[:25]}{'...' if len(self.text) > 25 else ''}")
-        rapport.append(f"Nombre de caractères : {self.stats['caracteres']['nombre_caracteres']:,} caractères")
+        yield f"Texte : {self.text[:25]}{'...' if len(self.text) > 25 else ''}"
+        yield f"Nombre de caractères : {self.stats['caracteres']['nombre_caracteres']:,} caractères"
         
         if "mots" in self.stats:
             mots = self.stats["mots"]
-            rapport.append(template.format(titre="Nombre de mots", valeur=mots['nombre_mots']))
-            rapport.append(f" . Longueur moyenne : {mots['longueur_moyenne']:.2f}")
+            yield template.format(titre="Nombre de mots", valeur=mots['nombre_mots'])
+            yield f" . Longueur moyenne : {mots['longueur_moyenne']:.2f}"
         
         if "caracteres" in self.stats:
             caracteres = self.stats["caracteres"]
-            rapport.append(template.format(titre="Nombre de lettres", valeur=caracteres['lettres']))
+            yield template.format(titre="Nombre de lettres", valeur=caracteres['lettres'])
             pourcentage_lettres = caracteres['lettres'] / self.stats['caracteres']['nombre_caracteres'] * 100
-            rapport.append(f" . Pourcentage de lettres : {pourcentage_lettres:.1f}%")
+            yield f" . Pourcentage de lettres : {pourcentage_lettres:.1f}%"
         
         if "regex" in self.stats:
             regex = self.stats["regex"]
-            rapport.append(f"Emails trouvés : {len(regex['emails'])}")
-        
-        return "\n".join(rapport)
+            yield f"Emails trouvés : {len(regex['emails'])}"
+
+
+# Colonnes retournées par analyser_lot(), nommées comme les clés de TextAnalyzer.stats
+COLONNES_LOT = (
+    "nombre_caracteres", "lettres", "chiffres", "espaces",
+    "nombre_mots", "mots_uniques", "mot_le_plus_long", "longueur_moyenne",
+    "nombre_lignes", "lignes_vides", "lignes_avec_texte",
+    "commence_par_voyelle", "fini_par_un_point", "commence_par_majuscule",
+)
+
+
+def mesurer_texte(texte):
+    """
+    Statistiques scalaires d'un texte, dans l'ordre de COLONNES_LOT.
+
+    Les valeurs sont celles de analyser_caracteres, analyser_mots, analyser_lignes
+    et detecter_patterns ; une valeur absente de stats (texte vide, aucun mot) vaut None.
+    """
+    if not texte:
+        return (None,) * len(COLONNES_LOT)
+
+    lettres, chiffres, espaces = compter_classes(texte)
+    mots = texte.split()
+    lignes = texte.splitlines()
+    lignes_vides = list(map(str.strip, lignes)).count("")
+
+    if mots:
+        nombre_mots = len(mots)
+        stats_mots = (
+            nombre_mots,
+            len(set(map(str.lower, mots))),
+            max(mots, key=len),
+            sum(map(len, mots)) / nombre_mots,
+        )
+    else:
+        stats_mots = (None,) * 4
+
+    premieres_lettres = "".join(map(itemgetter(0), mots))
+    return (
+        len(texte), lettres, chiffres, espaces,
+        *stats_mots,
+        len(lignes), lignes_vides, len(lignes) - lignes_vides,
+        sum(map(INITIALES_VOYELLES.__contains__, premieres_lettres)),
+        "".join(map(itemgetter(-1), mots)).count("."),
+        sum(map(str.isupper, premieres_lettres)),
+    )
+
+
+def analyser_paquet(textes):
+    """Analyse une liste de textes et retourne une liste de valeurs par colonne"""
+    return [list(colonne) for colonne in zip(*map(mesurer_texte, textes))]
+
+
+@instrumenter(elements=lambda textes, *args, **kwargs: len(textes) if hasattr(textes, "__len__") else 0)
+def analyser_lot(textes, taille_lot=TAILLE_LOT, processus=None):
+    """
+    Analyse un grand nombre de textes courts et retourne les résultats en colonnes.
+
+    Aucun TextAnalyzer ni dictionnaire par texte n'est créé : chaque colonne de
+    COLONNES_LOT est une liste avec une valeur par texte, dans l'ordre d'entrée.
+    Les textes sont lus par paquets de `taille_lot`, éventuellement répartis sur
+    `processus` processus (au plus deux paquets en attente par processus).
+
+    Objectif de débit : au moins 35 000 textes courts (~140 caractères) par seconde
+    et par cœur, soit environ 3 fois la boucle TextAnalyzer équivalente (voir benchmark.py).
+
+    Exemple:
+        >>> colonnes = analyser_lot(["Bonjour le monde", "", "Ah oui."])
+        >>> colonnes["nombre_mots"]
+        [3, None, 2]
+    """
+    colonnes = {nom: [] for nom in COLONNES_LOT}
+    iterateur = iter(textes)
+    paquets = iter(lambda: list(islice(iterateur, taille_lot)), [])
+
+    def remplir(resultats):
+        for resultat in resultats:
+            for colonne, valeurs in zip(colonnes.values(), resultat):
+                colonne += valeurs
+
+    if not processus or processus <= 1:
+        remplir(map(analyser_paquet, paquets))
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as executeur:
+            remplir(map_borne(executeur, analyser_paquet, paquets, 2 * processus))
+    return colonnes
+
+
+def map_borne(executeur, fonction, elements, en_attente):
+    """Comme executeur.map(), mais sans soumettre plus de `en_attente` tâches à la fois"""
+    futures = deque()
+    for element in elements:
+        futures.append(executeur.submit(fonction, element))
+        if len(futures) >= en_attente:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
 
 
 # Test de la classe TextAnalyzer
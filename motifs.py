@@ -0,0 +1,166 @@
+"""
+Motifs - Registre d'expressions régulières partagé par TextAnalyzer et StationMeteo
+Tous les motifs d'un registre sont réunis en une seule alternative à groupes nommés :
+iterer() parcourt le texte une seule fois, quel que soit le nombre de motifs. extraire()
+garde la sémantique de re.findall motif par motif, sauf pour un registre sans chevauchements.
+"""
+
+import re
+from collections import namedtuple
+
+
+# Une correspondance trouvée par RegistreMotifs.iterer()
+Correspondance = namedtuple("Correspondance", ["nom", "valeur", "debut", "fin"])
+
+
+# Motifs prêts à l'emploi, à enregistrer selon les besoins
+URL = r"\bhttps?://[^\s<>\"']+[^\s<>\"'.,;:!?)]"
+TELEPHONE = r"(?<!\d)(?:\+33\s?|0)[1-9](?:[\s.-]?\d{2}){4}(?!\d)"
+DATE_ISO = r"\b\d{4}-\d{2}-\d{2}\b"
+
+
+class RegistreMotifs:
+    """
+    Registre de motifs nommés, compilés une fois et réunis en un seul scanner.
+
+    Chaque motif est une expression régulière ; s'il contient un groupe capturant,
+    la valeur extraite est ce groupe (comme re.findall), sinon la correspondance entière.
+    Une conversion optionnelle (float, int...) est appliquée à chaque valeur.
+
+    Le scanner essaie les motifs dans l'ordre d'enregistrement à chaque position du
+    texte : ses correspondances ne se chevauchent jamais, la première trouvée l'emporte.
+    Un motif plus spécifique doit donc passer `avant` un motif plus général.
+    Les références arrière numérotées (\\1) n'y sont pas prises en charge. Le texte n'est
+    parcouru qu'une fois, mais chaque position essaie les motifs tour à tour : sans
+    préfixe commun, re.findall motif par motif peut rester plus rapide.
+
+    iterer() utilise toujours le scanner, en un seul parcours du texte. extraire() aussi
+    si chevauchements=False ; sinon (par défaut) chaque motif est cherché séparément,
+    comme re.findall, et un même passage du texte peut correspondre à plusieurs motifs.
+
+    Exemple:
+        >>> registre = RegistreMotifs({"nombres": (r"\\b(\\d+)\\b", int)}, chevauchements=False)
+        >>> registre.enregistrer("dates_iso", DATE_ISO, avant="nombres")
+        >>> registre.extraire("Le 2024-05-12, 3 relevés")
+        {'dates_iso': ['2024-05-12'], 'nombres': [3]}
+    """
+
+    def __init__(self, motifs=None, chevauchements=True):
+        self.chevauchements = chevauchements  # bool: False pour extraire en un seul parcours
+        self._motifs = dict()      # dict: nom -> (re.Pattern, conversion)
+        self._scanners = dict()    # dict: tuple des noms -> (re.Pattern, dict nom -> index du groupe valeur)
+        for nom, motif in (motifs or dict()).items():
+            expression, conversion = motif if isinstance(motif, tuple) else (motif, None)
+            self.enregistrer(nom, expression, conversion)
+
+    def enregistrer(self, nom, expression, conversion=None, avant=None):
+        """Ajoute (ou remplace) un motif, à la fin ou juste avant le motif `avant`, et recompile le scanner"""
+        if not nom.isidentifier():
+            raise ValueError(f"Nom de motif invalide : {nom!r}")
+        if avant is not None and avant not in self._motifs:
+            raise KeyError(avant)
+        motif = (re.compile(expression), conversion)  # lève re.error si l'expression est invalide
+
+        self._motifs.pop(nom, None)
+        if avant is None:
+            self._motifs[nom] = motif
+        else:
+            motifs = dict()
+            for nom_existant, motif_existant in self._motifs.items():
+                if nom_existant == avant:
+                    motifs[nom] = motif
+                motifs[nom_existant] = motif_existant
+            self._motifs = motifs
+        self._scanners.clear()
+        self.scanner()
+
+    def retirer(self, nom):
+        del self._motifs[nom]
+        self._scanners.clear()
+
+    def noms(self):
+        return list(self._motifs)  # list[str]
+
+    def motif(self, nom):
+        """Expression compilée et conversion du motif `nom`"""
+        return self._motifs[nom]  # tuple: (re.Pattern, conversion ou None)
+
+    def scanner(self, noms=None):
+        """
+        Alternative compilée de tous les motifs (ou de `noms`, dans cet ordre), un groupe
+        nommé par motif, et pour chaque nom l'index du groupe qui porte sa valeur
+        """
+        noms = tuple(self._motifs) if noms is None else tuple(noms)
+        if noms not in self._scanners:
+            alternatives = []
+            index_valeurs = dict()
+            index = 1
+            for nom in noms:
+                motif, _ = self._motifs[nom]
+                alternatives.append(f"(?P<{nom}>{motif.pattern})")
+                # Le groupe nommé englobe le motif : ses propres groupes viennent juste après
+                index_valeurs[nom] = index + 1 if motif.groups == 1 else index
+                index += motif.groups + 1
+            self._scanners[noms] = (re.compile("|".join(alternatives)), index_valeurs)
+        return self._scanners[noms]  # tuple: (re.Pattern, dict[str, int])
+
+    def _valeur(self, trouve, index_valeurs):
+        """Valeur brute (avant conversion) d'une correspondance du scanner"""
+        nom = trouve.lastgroup
+        groupes = self._motifs[nom][0].groups
+        if groupes > 1:
+            return trouve.group(*range(index_valeurs[nom] + 1, index_valeurs[nom] + 1 + groupes))
+        return trouve.group(index_valeurs[nom])
+
+    def iterer(self, texte, noms=None):
+        """Produit les correspondances de tous les motifs (ou de `noms`) dans l'ordre du texte, en un seul parcours"""
+        scanner, index_valeurs = self.scanner(noms)
+        for trouve in scanner.finditer(texte):
+            valeur = self._valeur(trouve, index_valeurs)
+            conversion = self._motifs[trouve.lastgroup][1]
+            if conversion is not None:
+                valeur = conversion(valeur)
+            yield Correspondance(trouve.lastgroup, valeur, trouve.start(), trouve.end())
+
+    def extraire(self, texte, noms=None):
+        """
+        Retourne un dictionnaire nom -> liste des valeurs : re.findall pour chaque motif,
+        ou un seul parcours du scanner pour un registre sans chevauchements
+        """
+        noms = self.noms() if noms is None else list(noms)
+        if self.chevauchements:
+            resultats = {nom: self._motifs[nom][0].findall(texte) for nom in noms}
+        else:
+            scanner, index_valeurs = self.scanner(noms)
+            resultats = {nom: [] for nom in noms}
+            for trouve in scanner.finditer(texte):
+                resultats[trouve.lastgroup].append(self._valeur(trouve, index_valeurs))
+        for nom in noms:
+            conversion = self._motifs[nom][1]
+            if conversion is not None:
+                resultats[nom] = list(map(conversion, resultats[nom]))
+        return resultats
+
+
+# Motifs de TextAnalyzer.detecter_avec_regex() ; les analyses incrémentales et en flux
+# supposent qu'aucune correspondance ne traverse une fin de ligne, y compris pour les motifs ajoutés.
+# Les chevauchements sont gardés : les chiffres d'une adresse e-mail sont aussi des nombres
+MOTIFS_TEXTE = RegistreMotifs({
+    "emails": r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b",
+    "nombres": r"\b\d+\b",
+})
+
+# Motifs de StationMeteo.extraire_donnees_avec_regex(), qui garde les chevauchements de
+# re.findall ; releves.py lit les journaux ligne par ligne avec leur scanner
+MOTIFS_METEO = RegistreMotifs({
+    # Températures : "18.5°C" ou "Température: 18.5°C"
+    "temperatures": (r"(?:Température:\s*)?(-?\d+(?:\.\d+)?)°C", float),
+    # Humidité : "65%" ou "Humidité: 65%"
+    "humidites": (r"(?:Humidité:\s*)?(\d+)%", int),
+    # Pressions : "1013 hPa" ou "Pression: 1013 hPa"
+    "pressions": (r"(?:Pression:\s*)?(\d+)\s*hPa", int),
+    # Dates au format DD/MM/YYYY
+    "dates": r"(\d{2}/\d{2}/\d{4})",
+    # Heures au format HH:MM
+    "heures": r"(\d{2}:\d{2})",
+})
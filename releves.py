@@ -0,0 +1,91 @@
+"""
+Relevés - Lecture en flux des journaux de station météo, un enregistrement par relevé
+Contrairement à StationMeteo.extraire_donnees_avec_regex(), qui rend des listes
+séparées pour le texte entier, chaque relevé relie sa température à la date, l'heure,
+l'humidité et la pression de la même ligne. Le journal est lu bloc par bloc et découpé
+en lignes comme par str.splitlines() : la mémoire utilisée ne dépend que de la taille
+des blocs et de la plus longue ligne.
+"""
+
+from collections import namedtuple
+
+from main import TAILLE_BLOC, lire_lignes
+from motifs import MOTIFS_METEO
+
+
+# Un relevé : les champs absents de la ligne valent None
+Releve = namedtuple("Releve", ["date", "heure", "temperature", "humidite", "pression"], defaults=(None,) * 5)
+
+# Motif de MOTIFS_METEO de chaque champ de Releve, dans l'ordre de priorité du scanner
+MOTIFS_CHAMPS = {
+    "temperature": "temperatures",
+    "humidite": "humidites",
+    "pression": "pressions",
+    "date": "dates",
+    "heure": "heures",
+}
+
+
+def _scanner_releves():
+    """
+    Scanner de MOTIFS_METEO réduit aux motifs de MOTIFS_CHAMPS, et pour chaque motif
+    (position du champ dans Releve, index du groupe valeur, conversion).
+    """
+    scanner, index_valeurs = MOTIFS_METEO.scanner(MOTIFS_CHAMPS.values())
+    valeurs = dict()
+    for champ, nom in MOTIFS_CHAMPS.items():
+        motif, conversion = MOTIFS_METEO.motif(nom)
+        if motif.groups > 1:
+            raise ValueError(f"Le motif {nom!r} doit avoir au plus un groupe capturant")
+        valeurs[nom] = (Releve._fields.index(champ), index_valeurs[nom], conversion)
+    return scanner, valeurs
+
+
+SCANNER_RELEVES, VALEURS_CHAMPS = _scanner_releves()
+
+
+def _est_releve(champs):
+    return champs[2] is not None or champs[3] is not None or champs[4] is not None
+
+
+def releves_des_lignes(lignes):
+    """Produit les relevés de lignes sans fin de ligne ; un champ qui revient sur une ligne commence un nouveau relevé"""
+    for ligne in lignes:
+        champs = None
+        for trouve in SCANNER_RELEVES.finditer(ligne):
+            position, index, conversion = VALEURS_CHAMPS[trouve.lastgroup]
+            if champs is None or champs[position] is not None:
+                if champs is not None and _est_releve(champs):
+                    yield Releve._make(champs)
+                champs = [None] * 5
+            valeur = trouve.group(index)
+            champs[position] = valeur if conversion is None else conversion(valeur)
+        if champs is not None and _est_releve(champs):
+            yield Releve._make(champs)
+
+
+def releves_du_texte(texte):
+    """
+    Produit les relevés d'un texte, ligne par ligne (lignes de str.splitlines()). Une ligne
+    donne un relevé si elle contient une température, une humidité ou une pression ;
+    un champ qui revient sur la même ligne commence un nouveau relevé.
+
+    Exemple:
+        >>> list(releves_du_texte("12/05/2024 08:00 Température: 18.5°C Humidité: 65%\\n# Relevé Paris\\n"))
+        [Releve(date='12/05/2024', heure='08:00', temperature=18.5, humidite=65, pression=None)]
+    """
+    return releves_des_lignes(texte.splitlines())
+
+
+def lire_releves(source, taille_bloc=TAILLE_BLOC, encoding="utf-8"):
+    """
+    Produit les relevés d'un journal (chemin, objet fichier ou itérable de morceaux
+    str/bytes, comme TextAnalyzer.depuis_flux), au fil de la lecture.
+
+    Exemple:
+        >>> for releve in lire_releves(["12/05/2024 08:00 18.5°C\\n12/05", "/2024 09:30 21°C\\n"]):
+        ...     print(releve.date, releve.heure, releve.temperature)
+        12/05/2024 08:00 18.5
+        12/05/2024 09:30 21.0
+    """
+    return releves_des_lignes(lire_lignes(source, taille_bloc, encoding))
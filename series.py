@@ -0,0 +1,216 @@
+"""
+Séries - Historique borné des mesures d'une station, avec agrégats glissants
+SerieMeteo range les mesures dans des array circulaires qui grandissent au fil des
+ajouts jusqu'à la rétention : l'ajout est en O(1) et les plus anciennes mesures sont
+ensuite écrasées. Moyenne,
+minimum et maximum de chaque grandeur et nombre de mesures pluvieuses sont tenus à
+jour à chaque ajout sur une fenêtre glissante, et se lisent donc en O(1).
+"""
+
+import math
+from array import array
+from collections import deque
+
+
+class AgregatGlissant:
+    """
+    Moyenne, minimum et maximum des valeurs d'une fenêtre glissante, ajoutées et
+    retirées dans l'ordre d'arrivée. Minimum et maximum sont tenus par des files
+    monotones (O(1) amorti) ; une valeur NaN est une mesure absente et est ignorée.
+    """
+
+    def __init__(self):
+        self.somme = 0.0           # float
+        self.nombre = 0            # int: valeurs présentes dans la fenêtre
+        self._minimums = deque()   # deque[(indice, valeur)]: valeurs croissantes
+        self._maximums = deque()   # deque[(indice, valeur)]: valeurs décroissantes
+
+    def ajouter(self, indice, valeur):
+        if math.isnan(valeur):
+            return
+        self.somme += valeur
+        self.nombre += 1
+        while self._minimums and self._minimums[-1][1] >= valeur:
+            self._minimums.pop()
+        self._minimums.append((indice, valeur))
+        while self._maximums and self._maximums[-1][1] <= valeur:
+            self._maximums.pop()
+        self._maximums.append((indice, valeur))
+
+    def retirer(self, indice, valeur):
+        """Retire la plus ancienne valeur de la fenêtre, ajoutée avec `indice`"""
+        if math.isnan(valeur):
+            return
+        self.somme -= valeur
+        self.nombre -= 1
+        if self._minimums[0][0] == indice:
+            self._minimums.popleft()
+        if self._maximums[0][0] == indice:
+            self._maximums.popleft()
+
+    def moyenne(self):
+        return self.somme / self.nombre if self.nombre else None
+
+    def minimum(self):
+        return self._minimums[0][1] if self._minimums else None
+
+    def maximum(self):
+        return self._maximums[0][1] if self._maximums else None
+
+
+# Forme d'origine des valeurs numériques d'une mesure (bits de SerieMeteo.formes)
+TEMPERATURE_ENTIERE, PRESSION_ENTIERE, SANS_PRESSION, HUMIDITE_ENTIERE = 1, 2, 4, 8
+
+
+class SerieMeteo:
+    """
+    Dernières mesures d'une station (dict temp, humidite, pression, ville, pluvieux),
+    dans des array circulaires alloués au fil des ajouts.
+
+    Args:
+        retention (int): nombre de mesures conservées ; au-delà, chaque ajout
+            écrase la plus ancienne
+        fenetre (int): nombre de dernières mesures couvertes par les agrégats
+            (au plus `retention`, toutes les mesures conservées par défaut)
+
+    Exemple:
+        >>> serie = SerieMeteo(retention=3)
+        >>> for temp in (12, 18.5, 21, 9):
+        ...     serie.append({"temp": temp, "humidite": 60, "ville": "Paris", "pluvieux": temp < 10})
+        >>> len(serie), serie[0]["temp"], serie.moyenne("temp"), serie.maximum("temp"), serie.pluies
+        (3, 18.5, 16.166666666666668, 21.0, 1)
+    """
+
+    METRIQUES = ("temp", "humidite", "pression")
+
+    def __init__(self, retention=86_400, fenetre=None):
+        fenetre = retention if fenetre is None else fenetre
+        if retention < 1 or not 1 <= fenetre <= retention:
+            raise ValueError(f"Rétention et fenêtre invalides : {retention}, {fenetre} (attendu : 1 <= fenêtre <= rétention)")
+        self.retention = retention                          # int
+        self.fenetre = fenetre                              # int
+        self.total = 0                                      # int: mesures reçues depuis la création
+        # Colonnes vides au départ, complétées jusqu'à `retention` éléments puis réécrites en anneau
+        self.temperatures = array("d")                      # array("d")
+        self.humidites = array("d")                         # array("d")
+        self.pressions = array("d")                         # array("d"): NaN si absente
+        self.pluvieux = array("B")                          # array("B")
+        self.formes = array("B")                            # array("B"): bits TEMPERATURE_ENTIERE...
+        self.villes = []                                    # list[str]
+        self.agregats = {metrique: AgregatGlissant() for metrique in self.METRIQUES}  # dict
+        self.pluies = 0                                     # int: mesures pluvieuses dans la fenêtre
+        self._ajouts_depuis_recalcul = 0                    # int
+
+    def __len__(self):
+        return min(self.total, self.retention)
+
+    def _valeurs(self, indice):
+        """(temp, humidite, pression) de la mesure d'indice absolu `indice`, en float"""
+        position = indice % self.retention
+        return self.temperatures[position], self.humidites[position], self.pressions[position]
+
+    def append(self, mesure):
+        """
+        Ajoute une mesure (dict) en O(1), en écrasant la plus ancienne si la série est pleine.
+        Les champs sont convertis avant toute modification : une mesure invalide lève
+        TypeError ou ValueError et laisse la série inchangée.
+        """
+        temp, humidite, pression = mesure["temp"], mesure["humidite"], mesure.get("pression")
+        ville = mesure["ville"]
+        for nom, valeur in (("temp", temp), ("humidite", humidite), ("pression", pression)):
+            if not isinstance(valeur, (int, float)) and (nom != "pression" or valeur is not None):
+                raise TypeError(f"{nom} doit être int ou float, reçu {type(valeur).__name__}")
+        valeurs = (float(temp), float(humidite), math.nan if pression is None else float(pression))
+        pluvieux = bool(mesure["pluvieux"])
+        forme = (isinstance(temp, int) * TEMPERATURE_ENTIERE + isinstance(humidite, int) * HUMIDITE_ENTIERE
+                 + (SANS_PRESSION if pression is None else isinstance(pression, int) * PRESSION_ENTIERE))
+
+        indice = self.total
+        position = indice % self.retention
+        if indice >= self.fenetre:
+            sortante = indice - self.fenetre
+            for agregat, valeur in zip(self.agregats.values(), self._valeurs(sortante)):
+                agregat.retirer(sortante, valeur)
+            self.pluies -= self.pluvieux[sortante % self.retention]
+
+        if position == len(self.temperatures):
+            self.temperatures.append(valeurs[0])
+            self.humidites.append(valeurs[1])
+            self.pressions.append(valeurs[2])
+            self.pluvieux.append(pluvieux)
+            self.formes.append(forme)
+            self.villes.append(ville)
+        else:
+            self.temperatures[position], self.humidites[position], self.pressions[position] = valeurs
+            self.pluvieux[position] = pluvieux
+            self.formes[position] = forme
+            self.villes[position] = ville
+        self.total += 1
+
+        for agregat, valeur in zip(self.agregats.values(), valeurs):
+            agregat.ajouter(indice, valeur)
+        self.pluies += pluvieux
+
+        # Les sommes glissantes accumulent des erreurs d'arrondi : recalcul exact une fois par fenêtre
+        self._ajouts_depuis_recalcul += 1
+        if self._ajouts_depuis_recalcul >= self.fenetre:
+            self._recalculer_sommes()
+
+    def _recalculer_sommes(self):
+        debut = max(self.total - self.fenetre, 0)
+        colonnes = list(zip(*map(self._valeurs, range(debut, self.total))))
+        for agregat, valeurs in zip(self.agregats.values(), colonnes):
+            agregat.somme = math.fsum(valeur for valeur in valeurs if not math.isnan(valeur))
+        self._ajouts_depuis_recalcul = 0
+
+    def __getitem__(self, index):
+        """
+        Mesure `index` (0 : la plus ancienne conservée, -1 : la dernière), sous forme de
+        dict ; une tranche donne la liste des mesures correspondantes.
+        """
+        taille = len(self)
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(taille))]
+        if index < 0:
+            index += taille
+        if not 0 <= index < taille:
+            raise IndexError("Indice de mesure hors de la série")
+        position = (self.total - taille + index) % self.retention
+        forme = self.formes[position]
+        temperature = self.temperatures[position]
+        humidite = self.humidites[position]
+        mesure = {
+            "temp": int(temperature) if forme & TEMPERATURE_ENTIERE else temperature,
+            "humidite": int(humidite) if forme & HUMIDITE_ENTIERE else humidite,
+        }
+        if not forme & SANS_PRESSION:
+            pression = self.pressions[position]
+            mesure["pression"] = int(pression) if forme & PRESSION_ENTIERE else pression
+        mesure["ville"] = self.villes[position]
+        mesure["pluvieux"] = bool(self.pluvieux[position])
+        return mesure
+
+    def __iter__(self):
+        """Mesures conservées, de la plus ancienne à la plus récente"""
+        return map(self.__getitem__, range(len(self)))
+
+    def moyenne(self, metrique):
+        """Moyenne de `metrique` (temp, humidite, pression) sur la fenêtre, None sans valeur"""
+        return self.agregats[metrique].moyenne()
+
+    def minimum(self, metrique):
+        return self.agregats[metrique].minimum()
+
+    def maximum(self, metrique):
+        return self.agregats[metrique].maximum()
+
+    def resume(self):
+        """Agrégats de la fenêtre : taille, pluies et moyenne, minimum et maximum par grandeur"""
+        resume = {"taille": min(self.total, self.fenetre), "pluies": self.pluies}  # dict
+        for metrique, agregat in self.agregats.items():
+            resume[metrique] = {
+                "moyenne": agregat.moyenne(),   # float ou None
+                "minimum": agregat.minimum(),   # float ou None
+                "maximum": agregat.maximum(),   # float ou None
+            }
+        return resume
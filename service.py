@@ -0,0 +1,264 @@
+"""
+Service - Analyse asynchrone de textes pour les applications asyncio
+Les analyses sont confiées à un exécuteur borné pour ne pas bloquer la boucle
+d'événements ; un sémaphore limite les analyses en cours et fait attendre les
+appelants (et la lecture des flux) quand le service est saturé.
+
+Démonstration : `python service.py` lance un serveur TCP local et le charge
+avec des clients concurrents.
+"""
+
+import argparse
+import asyncio
+import codecs
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from main import TAILLE_BLOC, StatistiquesPartielles, TextAnalyzer
+
+
+TAILLE_SEGMENT = 1 << 20  # caractères d'un flux envoyés ensemble à l'exécuteur
+
+
+def analyser_texte(texte):
+    """Statistiques complètes d'un texte, comme TextAnalyzer(texte).analyser_tout()"""
+    return TextAnalyzer(texte).analyser_tout()
+
+
+def analyser_segment(texte, options):
+    """StatistiquesPartielles d'un segment de flux terminé par une fin de ligne (sauf le dernier)"""
+    partiel = StatistiquesPartielles(**options)
+    partiel.ajouter(texte)
+    return partiel
+
+
+class ServiceAnalyse:
+    """
+    Analyses asynchrones de textes ou de flux de morceaux.
+
+    Args:
+        max_en_cours (int): nombre maximal d'analyses (ou de segments de flux) confiées
+            à l'exécuteur en même temps ; au-delà, les appels attendent une place
+        executeur (Executor): exécuteur des analyses ; par défaut des threads, un
+            ProcessPoolExecutor répartit les analyses sur plusieurs cœurs
+        delai (float): délai maximal par défaut d'une analyse, en secondes
+        cache (cache.CacheResultats): résultats déjà calculés ; analyser() répond alors
+            sans passer par l'exécuteur pour un texte déjà analysé
+
+    Exemple:
+        >>> async def principal():
+        ...     async with ServiceAnalyse(max_en_cours=2) as service:
+        ...         stats = await service.analyser("Bonjour le monde")
+        ...     return stats["mots"]["nombre_mots"]
+        >>> asyncio.run(principal())
+        3
+    """
+
+    def __init__(self, max_en_cours=4, executeur=None, delai=None, cache=None):
+        self.max_en_cours = max_en_cours            # int
+        self.executeur = executeur or ThreadPoolExecutor(max_en_cours)  # Executor
+        self._executeur_propre = executeur is None  # bool: fermé avec le service
+        self.delai = delai                          # float ou None
+        self.cache = cache                          # CacheResultats ou None
+        self._places = asyncio.Semaphore(max_en_cours)
+        self._occupees = 0                          # int: places prises, modifié depuis la boucle seulement
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exception):
+        self.fermer()
+
+    def fermer(self):
+        if self._executeur_propre:
+            self.executeur.shutdown(wait=False, cancel_futures=True)
+
+    def en_cours(self):
+        """Nombre de places occupées dans l'exécuteur"""
+        return self._occupees
+
+    def _liberer(self):
+        self._occupees -= 1
+        self._places.release()
+
+    async def _soumettre(self, fonction, *args):
+        """
+        Attend une place puis confie `fonction(*args)` à l'exécuteur.
+
+        Retourne un asyncio.Future. La place n'est libérée qu'à la fin réelle du calcul :
+        une annulation retire le calcul de l'exécuteur s'il n'a pas commencé, mais un
+        calcul déjà démarré garde sa place jusqu'à la fin.
+        """
+        await self._places.acquire()
+        self._occupees += 1
+        boucle = asyncio.get_running_loop()
+        try:
+            calcul = self.executeur.submit(fonction, *args)
+        except BaseException:
+            self._liberer()
+            raise
+
+        def liberer(_):
+            # Un calcul abandonné (délai dépassé) peut finir après la fermeture de la boucle
+            try:
+                boucle.call_soon_threadsafe(self._liberer)
+            except RuntimeError:
+                pass
+
+        calcul.add_done_callback(liberer)
+        return asyncio.wrap_future(calcul)
+
+    async def _avec_delai(self, coroutine, delai):
+        delai = self.delai if delai is None else delai
+        if delai is None:
+            return await coroutine
+        return await asyncio.wait_for(coroutine, delai)
+
+    async def analyser(self, texte, delai=None):
+        """
+        Retourne les statistiques de analyser_tout() pour `texte`, sans bloquer la boucle.
+        Lève TimeoutError si l'analyse (attente d'une place comprise) dépasse `delai`.
+        """
+        if not isinstance(texte, str):
+            raise TypeError("Le texte doit être une chaîne de caractères")
+
+        async def analyse():
+            stats = await (await self._soumettre(analyser_texte, texte))
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.enregistrer, texte, None, stats)
+            return stats
+
+        # Empreinte du texte et requêtes SQLite hors de la boucle (le cache est protégé par un verrou)
+        if self.cache is not None:
+            stats = await asyncio.to_thread(self.cache.obtenir, texte)
+            if stats is not None:
+                return stats
+
+        return await self._avec_delai(analyse(), delai)
+
+    async def analyser_flux(self, morceaux, delai=None, encoding="utf-8", taille_segment=TAILLE_SEGMENT, **options):
+        """
+        Analyse un itérable asynchrone de morceaux str ou bytes et retourne les mêmes
+        statistiques que TextAnalyzer.depuis_flux(...).analyser_tout().
+
+        Les morceaux sont regroupés en segments coupés après un "\\n", analysés en
+        parallèle puis fusionnés dans l'ordre. La lecture de `morceaux` s'interrompt
+        tant que le service est saturé. Les `options` sont celles de StatistiquesPartielles.
+        """
+        return await self._avec_delai(self._analyser_flux(morceaux, encoding, taille_segment, options), delai)
+
+    async def _analyser_flux(self, morceaux, encoding, taille_segment, options):
+        decodeur = codecs.getincrementaldecoder(encoding)()
+        total = StatistiquesPartielles(**options)
+        en_attente = deque()     # deque[asyncio.Future]: segments confiés, dans l'ordre du texte
+        tampon = []              # list[str]: texte pas encore découpé
+        taille = 0               # int
+        seuil = taille_segment   # int: doublé tant qu'aucune fin de ligne n'est trouvée
+
+        async def confier(segment):
+            en_attente.append(await self._soumettre(analyser_segment, segment, options))
+            while en_attente and en_attente[0].done():
+                total.fusionner(en_attente.popleft().result())
+
+        try:
+            async for morceau in morceaux:
+                if isinstance(morceau, (bytes, bytearray)):
+                    morceau = decodeur.decode(morceau)
+                tampon.append(morceau)
+                taille += len(morceau)
+                if taille < seuil:
+                    continue
+                texte = "".join(tampon)
+                coupure = texte.rfind("\n") + 1
+                if not coupure:
+                    tampon, seuil = [texte], 2 * taille
+                    continue
+                tampon, taille, seuil = [texte[coupure:]], len(texte) - coupure, taille_segment
+                await confier(texte[:coupure])
+
+            texte = "".join(tampon) + decodeur.decode(b"", final=True)
+            if texte:
+                await confier(texte)
+            while en_attente:
+                total.fusionner(await en_attente.popleft())
+        finally:
+            for calcul in en_attente:
+                calcul.cancel()
+        return await asyncio.to_thread(total.vers_stats)
+
+
+async def lire_flux(lecteur, taille_bloc=TAILLE_BLOC):
+    """Itérable asynchrone des blocs d'un asyncio.StreamReader jusqu'à la fin du flux"""
+    while bloc := await lecteur.read(taille_bloc):
+        yield bloc
+
+
+async def servir(service, hote="127.0.0.1", port=8765):
+    """
+    Serveur TCP de démonstration : chaque connexion envoie un texte UTF-8 puis ferme
+    son écriture ; le serveur répond avec les statistiques en JSON (ou {"erreur": ...}).
+    """
+    async def traiter(lecteur, ecrivain):
+        try:
+            reponse = await service.analyser_flux(lire_flux(lecteur))
+        except Exception as erreur:
+            reponse = {"erreur": f"{type(erreur).__name__}: {erreur}"}
+        ecrivain.write(json.dumps(reponse, ensure_ascii=False).encode("utf-8"))
+        await ecrivain.drain()
+        ecrivain.close()
+        await ecrivain.wait_closed()
+
+    return await asyncio.start_server(traiter, hote, port)
+
+
+async def envoyer(texte, hote="127.0.0.1", port=8765):
+    """Client de démonstration : envoie un texte au serveur et retourne ses statistiques"""
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    ecrivain.write(texte.encode("utf-8"))
+    await ecrivain.drain()
+    ecrivain.write_eof()
+    reponse = await lecteur.read()
+    ecrivain.close()
+    await ecrivain.wait_closed()
+    return json.loads(reponse)
+
+
+async def tester_charge(textes, clients=20, hote="127.0.0.1", port=8765):
+    """Envoie `textes` avec `clients` connexions simultanées ; retourne (réponses, secondes)"""
+    limite = asyncio.Semaphore(clients)
+
+    async def client(texte):
+        async with limite:
+            return await envoyer(texte, hote, port)
+
+    debut = time.perf_counter()
+    reponses = await asyncio.gather(*(client(texte) for texte in textes))
+    return reponses, time.perf_counter() - debut
+
+
+async def demonstration(nombre_textes, taille, clients, max_en_cours, port):
+    from benchmark import generer_texte
+
+    textes = [generer_texte(taille, graine=i) for i in range(nombre_textes)]
+    async with ServiceAnalyse(max_en_cours=max_en_cours) as service:
+        serveur = await servir(service, port=port)
+        async with serveur:
+            reponses, secondes = await tester_charge(textes, clients, port=port)
+    erreurs = sum("erreur" in reponse for reponse in reponses)
+    volume = sum(map(len, textes))
+    print(f"{nombre_textes} textes ({volume:,} car.) en {secondes:.2f} s avec {clients} clients : "
+          f"{nombre_textes / secondes:,.0f} textes/s, {volume / secondes:,.0f} car./s, {erreurs} erreur(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur d'analyse asynchrone de démonstration")
+    parser.add_argument("--textes", type=int, default=200, help="nombre de textes envoyés")
+    parser.add_argument("--taille", type=int, default=50_000, help="taille de chaque texte en caractères")
+    parser.add_argument("--clients", type=int, default=20, help="connexions simultanées")
+    parser.add_argument("--max-en-cours", type=int, default=4, help="analyses simultanées du service")
+    parser.add_argument("--port", type=int, default=8765)
+    arguments = parser.parse_args()
+    asyncio.run(demonstration(arguments.textes, arguments.taille, arguments.clients,
+                              arguments.max_en_cours, arguments.port))
@@ -0,0 +1,137 @@
+"""
+Sorties - Écriture progressive des statistiques vers un fichier ou tout objet avec write()
+Les listes longues (mots_par_ligne, correspondances regex...) peuvent être abrégées,
+et les exports JSON et CSV sont écrits morceau par morceau, sans chaîne complète en mémoire.
+"""
+
+import csv
+import json
+from array import array
+from collections.abc import Mapping
+from itertools import islice
+
+
+TAILLE_TRANCHE = 4096  # éléments d'une longue liste encodés ensemble en JSON
+# Séries de longueur variable, tronquées à `limite` ; les tuples, de taille fixe
+# (positions (debut, fin), groupes d'une correspondance), sont toujours gardés entiers
+SERIES = (list, array)
+
+
+class Coupe:
+    """Marque la fin d'un conteneur abrégé : affiche le nombre d'éléments omis"""
+
+    def __init__(self, omis):
+        self.omis = omis  # int
+
+    def __repr__(self):
+        return f"... (+{self.omis})"
+
+
+def abreger(valeur, limite):
+    """
+    Copie de `valeur` dont les chaînes gardent au plus `limite` caractères et les
+    listes et array au plus `limite` éléments ; `valeur` elle-même si limite est None.
+    Les dict et enregistrements (catégories, résumés) sont abrégés valeur par valeur, sans perdre de clé.
+
+    Exemple:
+        >>> abreger({"mots_par_ligne": [3, 0, 5, 2, 7]}, 2)
+        {'mots_par_ligne': [3, 0, ... (+3)]}
+    """
+    if limite is None:
+        return valeur
+    if isinstance(valeur, str):
+        return valeur if len(valeur) <= limite else f"{valeur[:limite]}... (+{len(valeur) - limite} car.)"
+    if isinstance(valeur, Mapping):
+        return {cle: abreger(element, limite) for cle, element in valeur.items()}
+    if isinstance(valeur, tuple):
+        return tuple(abreger(element, limite) for element in valeur)
+    if isinstance(valeur, SERIES):
+        abrege = [abreger(element, limite) for element in valeur[:limite]]
+        if len(valeur) > limite:
+            abrege.append(Coupe(len(valeur) - limite))
+        return abrege
+    return valeur
+
+
+def ecrire_json(valeur, sortie, limite=None, tronques=None, chemin=""):
+    """
+    Écrit `valeur` en JSON dans `sortie`, les longues listes par tranches de TAILLE_TRANCHE.
+
+    Avec `limite`, les listes sont tronquées à `limite` éléments ; le nombre total
+    d'éléments de chaque liste tronquée est noté dans `tronques` (chemin -> taille).
+    """
+    if isinstance(valeur, Mapping):
+        sortie.write("{")
+        for index, (cle, element) in enumerate(valeur.items()):
+            cle = cle if isinstance(cle, str) else json.dumps(cle)
+            sortie.write(f"{', ' if index else ''}{json.dumps(cle, ensure_ascii=False)}: ")
+            ecrire_json(element, sortie, limite, tronques, f"{chemin}.{cle}" if chemin else cle)
+        sortie.write("}")
+        return
+    if isinstance(valeur, (list, tuple, array)):
+        tronquee = limite is not None and isinstance(valeur, SERIES) and len(valeur) > limite
+        elements = valeur[:limite] if tronquee else valeur
+        sortie.write("[")
+        for debut in range(0, len(elements), TAILLE_TRANCHE):
+            tranche = elements[debut:debut + TAILLE_TRANCHE]
+            if debut:
+                sortie.write(", ")
+            if any(isinstance(element, (Mapping, list, tuple, array)) for element in tranche):
+                for index, element in enumerate(tranche):
+                    sortie.write(", " if index else "")
+                    ecrire_json(element, sortie, limite, tronques, f"{chemin}[{debut + index}]")
+            else:
+                sortie.write(json.dumps(list(tranche), ensure_ascii=False)[1:-1])
+        sortie.write("]")
+    else:
+        sortie.write(json.dumps(valeur, ensure_ascii=False))
+        return
+    if tronquee and tronques is not None:
+        tronques[chemin] = len(valeur)
+
+
+def ecrire_stats_json(stats, sortie, limite=None):
+    """
+    Écrit un dictionnaire de statistiques en JSON. Si des listes sont tronquées,
+    une clé finale "_tronques" donne leur taille réelle ("lignes.mots_par_ligne": 3529839).
+    """
+    tronques = dict()
+    sortie.write("{")
+    for index, (categorie, valeurs) in enumerate(stats.items()):
+        sortie.write(f"{', ' if index else ''}{json.dumps(categorie, ensure_ascii=False)}: ")
+        ecrire_json(valeurs, sortie, limite, tronques, categorie)
+    if tronques:
+        sortie.write(f"{', ' if stats else ''}\"_tronques\": {json.dumps(tronques, ensure_ascii=False)}")
+    sortie.write("}\n")
+
+
+def lignes_csv(stats, limite=None):
+    """
+    Produit les lignes (categorie, cle, index, valeur) : une par valeur simple, une par
+    élément des listes et dict. Une liste tronquée se termine par (..., "...", taille réelle).
+    """
+    for categorie, valeurs in stats.items():
+        for cle, valeur in valeurs.items():
+            if isinstance(valeur, Mapping):
+                elements = valeur.items()
+            elif isinstance(valeur, tuple):
+                elements = enumerate(valeur)
+            elif isinstance(valeur, SERIES):
+                elements = islice(enumerate(valeur), limite)
+            else:
+                yield categorie, cle, "", valeur
+                continue
+            for index, element in elements:
+                if isinstance(element, (Mapping, list, tuple, array)):
+                    element = json.dumps(abreger(list(element) if isinstance(element, array) else element, limite),
+                                         ensure_ascii=False, default=repr)
+                yield categorie, cle, index, element
+            if limite is not None and isinstance(valeur, SERIES) and len(valeur) > limite:
+                yield categorie, cle, "...", len(valeur)
+
+
+def ecrire_stats_csv(stats, sortie, limite=None):
+    """Écrit les statistiques en CSV (categorie, cle, index, valeur), ligne par ligne"""
+    ecrivain = csv.writer(sortie, lineterminator="\n")
+    ecrivain.writerow(("categorie", "cle", "index", "valeur"))
+    ecrivain.writerows(lignes_csv(stats, limite))
@@ -0,0 +1,194 @@
+"""
+Validation - Registre de règles de cohérence des mesures météorologiques
+Les règles d'un registre sont compilées en une seule boucle : un lot de mesures est
+vérifié en un passage, quel que soit le nombre de règles, et le rapport donne pour
+chaque règle les indices des mesures qui ne la respectent pas.
+"""
+
+import ast
+import builtins
+import sys
+
+
+# Champs d'une mesure (clés des dict de StationMeteo), utilisables dans les expressions
+CHAMPS = ("temp", "humidite", "pression", "ville", "pluvieux")
+# Seules fonctions utilisables dans les expressions : le code généré n'a accès à rien d'autre
+FONCTIONS = {nom: getattr(builtins, nom) for nom in ("abs", "all", "any", "bool", "float", "int", "len", "max", "min", "round", "str")}
+
+
+class RegistreRegles:
+    """
+    Registre de règles nommées, vérifiées ensemble en un seul passage sur les mesures.
+
+    Une règle est une expression Python sur les champs d'une mesure (temp, humidite,
+    pression, ville, pluvieux) et les fonctions de FONCTIONS, sans accès aux attributs,
+    vraie quand la mesure est cohérente, ou une fonction
+    qui reçoit la mesure (dict) et retourne un booléen. Une règle non bloquante est
+    rapportée comme les autres mais ne rend pas le lot invalide.
+
+    Exemple:
+        >>> regles = RegistreRegles({"temperatures": "-50 <= temp <= 60"})
+        >>> regles.enregistrer("pluie", lambda mesure: not mesure["pluvieux"] or mesure["humidite"] > 60)
+        >>> rapport = regles.valider([{"temp": 18.5, "humidite": 40, "pluvieux": True},
+        ...                           {"temp": 75, "humidite": 80, "pluvieux": True}])
+        >>> rapport["valide"], rapport["regles"]["temperatures"]["indices"], rapport["regles"]["pluie"]["indices"]
+        (False, [1], [0])
+    """
+
+    def __init__(self, regles=None):
+        self._regles = dict()          # dict: nom -> (condition, bloquante, champs utilisés)
+        self._verificateurs = dict()   # dict: (noms, arrêt, lot) -> (fonction compilée, champs lus)
+        for nom, condition in (regles or dict()).items():
+            self.enregistrer(nom, condition)
+
+    def enregistrer(self, nom, condition, bloquante=True):
+        """Ajoute (ou remplace) une règle : expression sur les champs ou fonction de la mesure"""
+        if not nom.isidentifier():
+            raise ValueError(f"Nom de règle invalide : {nom!r}")
+        if callable(condition):
+            champs = ()
+        else:
+            arbre = ast.parse(condition, mode="eval")  # lève SyntaxError si l'expression est invalide
+            # L'expression est insérée dans du code exécuté : ni attribut (__class__...), ni nom hors liste
+            attributs = sorted({noeud.attr for noeud in ast.walk(arbre) if isinstance(noeud, ast.Attribute)})
+            if attributs:
+                raise ValueError(f"Accès aux attributs interdit dans la règle {nom!r} : {', '.join(attributs)}")
+            noms = {noeud.id for noeud in ast.walk(arbre) if isinstance(noeud, ast.Name)}
+            inconnus = sorted(nom_champ for nom_champ in noms if nom_champ not in CHAMPS and nom_champ not in FONCTIONS)
+            if inconnus:
+                raise ValueError(f"Noms inconnus dans la règle {nom!r} : {', '.join(inconnus)} "
+                                 f"(attendu : {', '.join(CHAMPS)} ou {', '.join(FONCTIONS)})")
+            champs = tuple(champ for champ in CHAMPS if champ in noms)
+            condition = ast.unparse(arbre)  # forme normalisée (sans commentaire) insérée dans la boucle compilée
+        self._regles.pop(nom, None)
+        self._regles[nom] = (condition, bloquante, champs)
+        self._verificateurs.clear()
+
+    def retirer(self, nom):
+        del self._regles[nom]
+        self._verificateurs.clear()
+
+    def noms(self):
+        return list(self._regles)  # list[str]
+
+    def _verificateur(self, noms, arret, lot):
+        """
+        Compile les règles `noms` en une fonction verifier(mesures, fautives, limite) qui
+        parcourt les mesures une fois, remplit les listes `fautives` (au plus `limite`
+        indices par règle) et retourne (mesures examinées, nombre de fautives par règle).
+        """
+        cle = (noms, arret, lot)
+        if cle in self._verificateurs:
+            return self._verificateurs[cle]
+
+        regles = [self._regles[nom] for nom in noms]
+        fonctions = any(callable(condition) for condition, _, _ in regles)
+        champs = [champ for champ in CHAMPS if any(champ in champs_regle for _, _, champs_regle in regles)]
+        if lot and fonctions:
+            champs = list(CHAMPS)  # les fonctions reçoivent une mesure complète
+
+        espace = {"__builtins__": dict(FONCTIONS, zip=zip)}
+        lignes = ["def verifier(mesures, fautives, limite):"]
+        lignes += [f"    ajouter_{j} = fautives[{j}].append" for j in range(len(regles))]
+        lignes += [f"    nombre_{j} = 0" for j in range(len(regles))]
+        lignes.append("    i = -1")
+        if lot:
+            # `mesures` est la liste des colonnes des champs utilisés
+            lignes.append(f"    for {', '.join(champs) or '_'}, in zip(*mesures):")
+            if fonctions:
+                lignes.append("        mesure = {" + ", ".join(f"{champ!r}: {champ}" for champ in champs) + "}")
+        else:
+            lignes.append("    for mesure in mesures:")
+        lignes.append("        i += 1")
+        if not lot:
+            lignes += [f"        {champ} = mesure[{champ!r}]" for champ in champs]
+        tests = []
+        for j, (condition, _, _) in enumerate(regles):
+            if callable(condition):
+                espace[f"condition_{j}"] = condition
+                tests.append(f"condition_{j}(mesure)")
+            else:
+                tests.append(f"({condition})")
+        # Chemin rapide : une mesure qui respecte toutes les règles ne coûte qu'un test
+        if regles:
+            lignes += [f"        if {' and '.join(tests)}:",
+                       "            continue"]
+        for j, (test, (_, bloquante, _)) in enumerate(zip(tests, regles)):
+            lignes += [f"        if not {test}:",
+                       f"            nombre_{j} += 1",
+                       f"            if nombre_{j} <= limite:",
+                       f"                ajouter_{j}(i)"]
+            if arret and bloquante:
+                lignes.append("            echec = True")
+        if arret:
+            lignes.insert(1, "    echec = False")
+            lignes.append("        if echec:")
+            lignes.append("            break")
+        lignes.append(f"    return i + 1, [{', '.join(f'nombre_{j}' for j in range(len(regles)))}]")
+
+        exec(compile("\n".join(lignes), f"<règles {', '.join(noms)}>", "exec"), espace)
+        self._verificateurs[cle] = espace["verifier"], champs
+        return self._verificateurs[cle]
+
+    def _rapport(self, noms, verifier, mesures, limite):
+        fautives = [[] for _ in noms]
+        examinees, nombres = verifier(mesures, fautives, sys.maxsize if limite is None else limite)
+        regles = {
+            nom: {
+                "respectee": not nombre,   # bool
+                "fautives": nombre,        # int: mesures qui ne respectent pas la règle
+                "indices": indices,        # list[int]: au plus `limite` indices, dans l'ordre
+            }
+            for nom, nombre, indices in zip(noms, nombres, fautives)
+        }
+        return {
+            "valide": all(regles[nom]["respectee"] for nom in noms if self._regles[nom][1]),  # bool
+            "examinees": examinees,        # int
+            "regles": regles,              # dict
+        }
+
+    def valider(self, mesures, noms=None, arret_au_premier=False, limite=None):
+        """
+        Vérifie toutes les règles (ou `noms`) sur des mesures au format dict, en un passage.
+
+        Args:
+            mesures (itérable de dict): mesures (temp, humidite, pression, ville, pluvieux) ;
+                seuls les champs utilisés par les règles doivent être présents
+            noms (séquence de str): règles à vérifier, toutes par défaut
+            arret_au_premier (bool): s'arrêter à la première mesure qui ne respecte pas
+                une règle bloquante, au lieu de tout parcourir
+            limite (int): nombre maximal d'indices gardés par règle (None : tous) ;
+                les mesures fautives sont toujours toutes comptées
+
+        Returns:
+            dict: valide, examinees et, par règle, respectee, fautives et indices
+        """
+        noms = tuple(self._regles) if noms is None else tuple(noms)
+        verifier, _ = self._verificateur(noms, arret_au_premier, False)
+        return self._rapport(noms, verifier, mesures, limite)
+
+    def valider_lot(self, lot, noms=None, arret_au_premier=False, limite=None):
+        """
+        Comme valider(), sur les colonnes d'un MesureBatch, sans dict par mesure (sauf
+        pour les règles données par une fonction). Les températures y sont des float.
+        """
+        noms = tuple(self._regles) if noms is None else tuple(noms)
+        verifier, champs = self._verificateur(noms, arret_au_premier, True)
+        colonnes = {
+            "temp": lambda: lot.temperatures,
+            "humidite": lambda: lot.humidites,
+            "pression": lambda: lot.pressions,
+            "ville": lambda: map(lot.villes.__getitem__, lot.codes_villes),
+            "pluvieux": lambda: map(bool, lot.pluvieux),
+        }
+        mesures = [colonnes[champ]() for champ in champs] or [range(len(lot))]
+        return self._rapport(noms, verifier, mesures, limite)
+
+
+# Règles de StationMeteo.valider_coherence_donnees()
+REGLES_METEO = RegistreRegles({
+    "temperatures": "-50 <= temp <= 60",
+    "humidites": "0 <= humidite <= 100",
+    # Il ne pleut pas sans une humidité supérieure à 60 %
+    "coherence_pluie": "not pluvieux or humidite > 60",
+})